@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Request, Response
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from database import get_db
-from models import Cookie, Order, Review, Admin
+from datetime import date, datetime
+from database import get_db, get_read_db
+from models import Cookie, Order, Review, Admin, CookieStock
 from auth import verify_password, create_access_token, verify_token
+from query_stats import query_budget
+from app_logging import get_logger
+from inventory import (
+    set_stock, release_stock, release_stock_bulk, adjust_reservation, reserve_stock, record_reservation,
+    order_stock_day, SoldOut,
+)
+from review_stats import apply_review
+from analytics import revenue_timeseries, AnalyticsQueryError, BUSINESS_TIMEZONE
+from columnar import snapshot, columnar_enabled
+from archive import order_history
 import os
 import shutil
 from pathlib import Path
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
+logger = get_logger("admin")
 
 # Schemas
 class LoginRequest(BaseModel):
@@ -34,11 +46,35 @@ class OrderUpdate(BaseModel):
     notes: Optional[str] = None
     delivery_address: Optional[str] = None
     payment_method: Optional[str] = None
-    delivery_date: Optional[str] = None
-    quantity: Optional[int] = None
+    delivery_date: Optional[date] = None
+    quantity: Optional[int] = Field(default=None, gt=0)
     cookie_name: Optional[str] = None
     contact: Optional[str] = None
 
+# Forward moves through the flow, or cancellation of an open order
+ORDER_FLOW = ["pending", "confirmed", "preparing", "out_for_delivery", "completed"]
+MAX_BULK_ITEMS = 1000
+
+def allowed_sources(target: str) -> List[str]:
+    """Statuses an order may move to `target` from in a bulk transition"""
+    if target == "cancelled":
+        return ORDER_FLOW[:-1]
+    return ORDER_FLOW[:ORDER_FLOW.index(target)]
+
+class BulkStatusFilter(BaseModel):
+    status: Optional[str] = None
+    delivery_date: Optional[date] = None
+    created_before: Optional[datetime] = None
+
+class BulkStatusUpdate(BaseModel):
+    status: str
+    order_ids: Optional[List[int]] = None
+    filter: Optional[BulkStatusFilter] = None
+
+class StockUpdate(BaseModel):
+    quantity: int
+    stock_date: Optional[date] = None  # Defaults to today
+
 # Auth dependency
 def get_current_admin(authorization: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
@@ -61,7 +97,8 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
 
 # Cookie Management
 @router.get("/cookies")
-def get_admin_cookies(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+@query_budget(1)
+def get_admin_cookies(db: Session = Depends(get_read_db), admin: str = Depends(get_current_admin)):
     return db.query(Cookie).all()
 
 @router.put("/cookies/{cookie_id}")
@@ -82,9 +119,11 @@ def update_cookie(
     db.commit()
     db.refresh(cookie)
     
-    # Invalidate cookie cache
+    # Invalidate cookie cache and republish the static menu
     from main import invalidate_cache
+    from menu_publisher import publish_menu
     invalidate_cache("cookies")
+    publish_menu(db)
     
     return cookie
 
@@ -101,9 +140,11 @@ def delete_cookie(
     db.delete(cookie)
     db.commit()
     
-    # Invalidate cookie cache
+    # Invalidate cookie cache and republish the static menu
     from main import invalidate_cache
+    from menu_publisher import publish_menu
     invalidate_cache("cookies")
+    publish_menu(db)
     
     return {"message": "Cookie deleted"}
 
@@ -111,21 +152,147 @@ def delete_cookie(
     db.commit()
     return {"message": "Cookie deleted"}
 
+# Compact default for order lists; the long text fields come from the detail endpoint
+ORDER_LIST_FIELDS = [
+    "id", "customer_name", "contact", "cookie_name", "quantity", "total_price",
+    "payment_method", "order_source", "status", "delivery_date", "created_at"
+]
+
+def parse_order_fields(fields: Optional[str]) -> List[str]:
+    """`fields=` projection: comma-separated column names, or 'all'"""
+    from archive import ORDER_COLUMNS
+    if not fields:
+        return ORDER_LIST_FIELDS
+    if fields == "all":
+        return ORDER_COLUMNS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in ORDER_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown order fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in requested if f != "id"]
+
 @router.get("/orders")
-def get_admin_orders(status: Optional[str] = None, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
-    query = db.query(Order)
+@query_budget(1)
+def get_admin_orders(
+    status: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    from sqlalchemy.orm import load_only
+    
+    columns = parse_order_fields(fields)
+    source = order_history() if include_archived else Order
+    # Only the projected columns are selected; the rest stay deferred and are never loaded
+    query = db.query(source).options(load_only(*[getattr(source, c) for c in columns]))
     if status and status != 'all':
-        query = query.filter(Order.status == status)
-    return query.order_by(Order.created_at.desc()).all()
+        query = query.filter(source.status == status)
+    return [{c: getattr(order, c) for c in columns} for order in query.order_by(source.created_at.desc()).all()]
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "customer_name", "contact", "cookie_name", "quantity", "total_price",
+    "payment_method", "delivery_date", "delivery_date_legacy", "delivery_address", "order_source", "status", "notes"
+]
+
+@router.get("/orders/export")
+def export_orders(
+    status: Optional[str] = None,
+    include_archived: bool = True,
+    admin: str = Depends(get_current_admin)
+):
+    """CSV of orders (archived ones included by default), streamed in batches"""
+    import csv
+    import io
+    from fastapi.responses import StreamingResponse
+    from database import SessionLocal, ReplicaSessionLocal
+    
+    def rows():
+        # Own session: the response body is produced after request dependencies are closed
+        db = (ReplicaSessionLocal or SessionLocal)()
+        try:
+            source = order_history() if include_archived else Order
+            query = db.query(*[getattr(source, c) for c in EXPORT_COLUMNS])
+            if status and status != 'all':
+                query = query.filter(source.status == status)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for i, row in enumerate(query.order_by(source.created_at.desc()).yield_per(1000), 1):
+                writer.writerow(row)
+                if i % 1000 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            db.close()
+    
+    filename = f"orders_{date.today().isoformat()}.csv"
+    return StreamingResponse(rows(), media_type="text/csv", headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@router.get("/orders/search")
+@query_budget(1)
+def search_admin_orders(
+    q: str,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    include_archived: bool = True,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Orders by phone number (any format, prefix match) or customer name, newest first.
+    Pass next_cursor back as `cursor` for the following page"""
+    from customers import search_orders, SearchError
+
+    columns = parse_order_fields(fields)
+    source = order_history() if include_archived else Order
+    try:
+        return search_orders(db, source, q, columns, limit, cursor)
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/customers/{contact}")
+@query_budget(1)
+def get_customer_summary(
+    contact: str,
+    include_archived: bool = True,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Order count, lifetime value and first/last order for a phone number"""
+    from customers import customer_summary, SearchError
+
+    try:
+        summary = customer_summary(db, order_history() if include_archived else Order, contact)
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No orders for this contact")
+    return summary
+
+@router.get("/orders/{order_id}")
+@query_budget(2)
+def get_admin_order(order_id: int, db: Session = Depends(get_read_db), admin: str = Depends(get_current_admin)):
+    """Full detail for one order, live or archived"""
+    from models import ArchivedOrder
+    order = db.get(Order, order_id) or db.get(ArchivedOrder, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
 
 @router.patch("/orders/{order_id}")
-async def update_order(
+@query_budget(10)
+def update_order(
     order_id: int, 
     order_update: OrderUpdate, 
     db: Session = Depends(get_db), 
     admin: str = Depends(get_current_admin)
 ):
-    from email_service import send_discord_status_update
+    from email_service import send_discord_status_update, call_on_loop
     import asyncio
     
     order = db.query(Order).filter(Order.id == order_id).first()
@@ -137,13 +304,13 @@ async def update_order(
     
     # Update fields
     update_data = order_update.dict(exclude_unset=True)
-    print(f"DEBUG: Updating Order {order_id} with data: {update_data}")
+    logger.debug("Updating order", extra={"order_id": order_id, "update": update_data})
     
     # If cookie or quantity changed, recalculate price
     if 'cookie_name' in update_data or 'quantity' in update_data:
         new_cookie_name = update_data.get('cookie_name', order.cookie_name)
         new_quantity = update_data.get('quantity', order.quantity)
-        print(f"DEBUG: Recalculating Price. Cookie: {new_cookie_name}, Qty: {new_quantity}")
+        logger.debug("Recalculating price", extra={"cookie_name": new_cookie_name, "quantity": new_quantity})
         
         # Get cookie price
         cookie = db.query(Cookie).filter(Cookie.name == new_cookie_name).first()
@@ -151,16 +318,36 @@ async def update_order(
             # Update price based on new quantity * cookie price
             new_total = cookie.price * new_quantity
             order.total_price = new_total
-            print(f"DEBUG: Found Cookie Price: {cookie.price}. New Total: {new_total}")
+            logger.debug("Found cookie price", extra={"price": cookie.price, "total_price": new_total})
         else:
-            print(f"DEBUG: Cookie '{new_cookie_name}' NOT FOUND. Cannot recalculate price.")
+            logger.warning("Cookie not found, cannot recalculate price", extra={"cookie_name": new_cookie_name})
     
+    old_cookie_name, old_quantity = order.cookie_name, order.quantity
     for key, value in update_data.items():
         setattr(order, key, value)
     
+    # Cancelling hands flash-sale stock back, reopening claims it again (on the day the
+    # order was placed), and edits move the reservation with the order
+    try:
+        if order.status == "cancelled" and old_status != "cancelled":
+            release_stock(db, order.id)
+        elif order.status != "cancelled" and old_status == "cancelled":
+            stock_id = reserve_stock(db, order.cookie_name, order.quantity, order_stock_day(order.created_at))
+            if stock_id is not None:
+                record_reservation(db, order.id, stock_id, order.quantity)
+        elif order.status != "cancelled" and (order.cookie_name, order.quantity) != (old_cookie_name, old_quantity):
+            adjust_reservation(db, order.id, order.cookie_name, order.quantity)
+    except SoldOut as e:
+        raise HTTPException(status_code=409, detail=f"Only {max(e.remaining, 0)} {e.cookie_name} left for this order's day")
+    
     db.commit()
     db.refresh(order)
-    print(f"DEBUG: Update Committed. Final Order: {order.quantity}x {order.cookie_name} = {order.total_price}")
+    from main import invalidate_cache
+    invalidate_cache("analytics")
+    logger.debug(
+        "Order update committed",
+        extra={"order_id": order.id, "quantity": order.quantity, "cookie_name": order.cookie_name, "total_price": order.total_price},
+    )
     
     # Send Discord notification if status changed or significant update
     try:
@@ -173,15 +360,76 @@ async def update_order(
             'total_price': order.total_price,
             'payment_method': order.payment_method,
             'status': order.status,
-            'delivery_date': order.delivery_date,
+            'delivery_date': order.delivery_date.isoformat() if order.delivery_date else None,
             'delivery_address': order.delivery_address
         }
-        asyncio.create_task(send_discord_status_update(order_dict, old_status))
+        call_on_loop(asyncio.create_task, send_discord_status_update(order_dict, old_status))
     except Exception as e:
-        print(f"⚠️ Failed to send Discord update: {str(e)}")
+        logger.warning("Failed to send Discord update", extra={"error": str(e)})
     
     return order
 
+@router.post("/orders/bulk-status")
+@query_budget(8)
+def bulk_update_order_status(
+    bulk: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Move many orders to one status with a single UPDATE ... RETURNING"""
+    from sqlalchemy import update
+    from email_service import send_discord_bulk_status_update, call_on_loop
+    import asyncio
+    
+    if bulk.status not in ORDER_FLOW and bulk.status != "cancelled":
+        raise HTTPException(status_code=400, detail=f"Unknown status '{bulk.status}'")
+    sources = allowed_sources(bulk.status)
+    if not sources:
+        raise HTTPException(status_code=400, detail=f"No order can move to '{bulk.status}'")
+    
+    conditions = [Order.status.in_(sources)]
+    if bulk.order_ids is not None:
+        if not bulk.order_ids or len(bulk.order_ids) > MAX_BULK_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_BULK_ITEMS} order ids")
+        conditions.append(Order.id.in_(bulk.order_ids))
+    if bulk.filter is not None:
+        if bulk.filter.status:
+            conditions.append(Order.status == bulk.filter.status)
+        if bulk.filter.delivery_date:
+            conditions.append(Order.delivery_date == bulk.filter.delivery_date)
+        if bulk.filter.created_before:
+            conditions.append(Order.created_at < bulk.filter.created_before)
+    if len(conditions) == 1:
+        raise HTTPException(status_code=400, detail="Provide order_ids or a filter")
+    
+    # updated_at is set explicitly: it is the watermark the analytics snapshot follows
+    rows = db.execute(
+        update(Order)
+        .where(*conditions)
+        .values(status=bulk.status, updated_at=datetime.utcnow())
+        .returning(
+            Order.id, Order.customer_name, Order.cookie_name, Order.quantity, Order.total_price
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    if len(rows) > MAX_BULK_ITEMS:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Filter matches more than {MAX_BULK_ITEMS} orders")
+    updated = [dict(row._mapping) for row in rows]
+    updated_ids = [o["id"] for o in updated]
+    
+    if bulk.status == "cancelled":
+        release_stock_bulk(db, updated_ids)
+    db.commit()
+    
+    from main import invalidate_cache
+    invalidate_cache("analytics")
+    logger.info("Bulk status update", extra={"status": bulk.status, "orders": len(updated_ids)})
+    call_on_loop(asyncio.create_task, send_discord_bulk_status_update(updated, bulk.status))
+    
+    skipped = sorted(set(bulk.order_ids or []) - set(updated_ids))
+    return {"status": bulk.status, "updated": updated_ids, "skipped": skipped}
+
 @router.delete("/orders/{order_id}")
 def delete_order(
     order_id: int, 
@@ -192,10 +440,57 @@ def delete_order(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    release_stock(db, order.id)
     db.delete(order)
     db.commit()
+    if columnar_enabled():
+        snapshot.forget(order_id)
+    
+    from main import invalidate_cache
+    invalidate_cache("analytics")
     return {"message": "Order deleted"}
 
+# Flash-sale inventory
+@router.get("/inventory")
+def get_inventory(
+    stock_date: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    day = stock_date or date.today()
+    rows = db.query(CookieStock).filter(CookieStock.stock_date == day).order_by(CookieStock.cookie_name).all()
+    return [
+        {
+            "cookie_name": row.cookie_name,
+            "stock_date": row.stock_date.isoformat(),
+            "quantity": row.quantity,
+            "reserved": row.reserved,
+            "remaining": row.quantity - row.reserved
+        } for row in rows
+    ]
+
+@router.put("/inventory/{cookie_id}")
+def update_inventory(
+    cookie_id: int,
+    stock_update: StockUpdate,
+    db: Session = Depends(get_db),
+    admin: str = Depends(get_current_admin)
+):
+    cookie = db.query(Cookie).filter(Cookie.id == cookie_id).first()
+    if not cookie:
+        raise HTTPException(status_code=404, detail="Cookie not found")
+    if stock_update.quantity < 0:
+        raise HTTPException(status_code=400, detail="Quantity cannot be negative")
+    
+    stock = set_stock(db, cookie.name, stock_update.quantity, stock_update.stock_date)
+    return {
+        "cookie_name": stock.cookie_name,
+        "stock_date": stock.stock_date.isoformat(),
+        "quantity": stock.quantity,
+        "reserved": stock.reserved,
+        "remaining": stock.quantity - stock.reserved
+    }
+
 # Image Upload
 @router.post("/upload-image")
 async def upload_image(file: UploadFile = File(...), admin: str = Depends(get_current_admin)):
@@ -217,11 +512,15 @@ async def upload_image(file: UploadFile = File(...), admin: str = Depends(get_cu
 
 # Stats
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+@query_budget(6)
+def get_stats(db: Session = Depends(get_read_db), admin: str = Depends(get_current_admin)):
+    from sqlalchemy import func
+    
     total_cookies = db.query(Cookie).count()
-    total_orders = db.query(Order).count()
+    history = order_history()
+    total_orders = db.query(func.count(history.id)).scalar()
     pending_orders = db.query(Order).filter(Order.status == "pending").count()
-    completed_orders = db.query(Order).filter(Order.status == "completed").count()
+    completed_orders = db.query(func.count(history.id)).filter(history.status == "completed").scalar()
     total_reviews = db.query(Review).count()
     pending_reviews = db.query(Review).filter(Review.approved == False).count()
     
@@ -236,50 +535,57 @@ def get_stats(db: Session = Depends(get_db), admin: str = Depends(get_current_ad
 
 # Revenue Analytics
 @router.get("/analytics/revenue")
-def get_revenue_analytics(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+@query_budget(6)
+def get_revenue_analytics(db: Session = Depends(get_read_db), admin: str = Depends(get_current_admin)):
     from sqlalchemy import func
     from datetime import datetime, timedelta
     
+    if columnar_enabled():
+        return snapshot.revenue_summary()
+    
+    # Revenue history includes archived orders
+    history = order_history()
+    
     # Calculate total revenue from completed orders
-    total_revenue = db.query(func.sum(Order.total_price)).filter(
-        Order.status.in_(["completed", "out_for_delivery"])
+    total_revenue = db.query(func.sum(history.total_price)).filter(
+        history.status.in_(["completed", "out_for_delivery"])
     ).scalar() or 0
     
     # Calculate average order value
-    avg_order_value = db.query(func.avg(Order.total_price)).filter(
-        Order.status != "cancelled"
+    avg_order_value = db.query(func.avg(history.total_price)).filter(
+        history.status != "cancelled"
     ).scalar() or 0
     
     # Get best-selling cookies
     best_sellers = db.query(
-        Order.cookie_name,
-        func.sum(Order.quantity).label('total_sold'),
-        func.sum(Order.total_price).label('revenue')
+        history.cookie_name,
+        func.sum(history.quantity).label('total_sold'),
+        func.sum(history.total_price).label('revenue')
     ).filter(
-        Order.status.in_(["completed", "out_for_delivery", "confirmed", "preparing"])
-    ).group_by(Order.cookie_name).order_by(func.sum(Order.quantity).desc()).limit(5).all()
+        history.status.in_(["completed", "out_for_delivery", "confirmed", "preparing"])
+    ).group_by(history.cookie_name).order_by(func.sum(history.quantity).desc()).limit(5).all()
     
     # Get daily revenue for last 7 days
     seven_days_ago = datetime.now() - timedelta(days=7)
     daily_sales = db.query(
-        func.date(Order.created_at).label('date'),
-        func.sum(Order.total_price).label('revenue'),
-        func.count(Order.id).label('order_count')
+        func.date(history.created_at).label('date'),
+        func.sum(history.total_price).label('revenue'),
+        func.count(history.id).label('order_count')
     ).filter(
-        Order.created_at >= seven_days_ago,
-        Order.status.in_(["completed", "out_for_delivery", "confirmed", "preparing"])
-    ).group_by(func.date(Order.created_at)).order_by(func.date(Order.created_at)).all()
+        history.created_at >= seven_days_ago,
+        history.status.in_(["completed", "out_for_delivery", "confirmed", "preparing"])
+    ).group_by(func.date(history.created_at)).order_by(func.date(history.created_at)).all()
     
     # Total orders this month
     this_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    monthly_orders = db.query(Order).filter(
-        Order.created_at >= this_month_start,
-        Order.status != "cancelled"
+    monthly_orders = db.query(history).filter(
+        history.created_at >= this_month_start,
+        history.status != "cancelled"
     ).count()
     
-    monthly_revenue = db.query(func.sum(Order.total_price)).filter(
-        Order.created_at >= this_month_start,
-        Order.status.in_(["completed", "out_for_delivery"])
+    monthly_revenue = db.query(func.sum(history.total_price)).filter(
+        history.created_at >= this_month_start,
+        history.status.in_(["completed", "out_for_delivery"])
     ).scalar() or 0
     
     return {
@@ -296,18 +602,154 @@ def get_revenue_analytics(db: Session = Depends(get_db), admin: str = Depends(ge
         ],
         "daily_sales": [
             {
-                "date": item[0].isoformat(),
+                "date": str(item[0]),  # date on PostgreSQL, already a string on SQLite
                 "revenue": float(item[1] or 0),
                 "order_count": item[2]
             } for item in daily_sales
         ]
     }
 
+@router.get("/analytics/timeseries")
+@query_budget(1)
+def get_analytics_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = "day",
+    group_by: str = "none",
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Revenue, order count and quantity per time bucket (business timezone), zero-filled"""
+    from datetime import datetime, timedelta
+    from zoneinfo import ZoneInfo
+    from main import get_cache, set_cache
+    
+    today = datetime.now(ZoneInfo(BUSINESS_TIMEZONE)).date()
+    end = end or today
+    start = start or end - timedelta(days=29)
+    
+    namespace = "analytics_closed" if end < today else "analytics"
+    cache_key = f"{namespace}:timeseries:{start}:{end}:{granularity}:{group_by}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        if columnar_enabled():
+            result = snapshot.timeseries(start, end, granularity, group_by)
+        else:
+            result = revenue_timeseries(db, start, end, granularity, group_by)
+    except AnalyticsQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cache(cache_key, result)
+    return result
+
+# Production planning
+@router.get("/production-plan")
+@query_budget(1)
+def get_production_plan(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Cookies to bake per delivery day (defaults to the next 7 days), with capacity flags"""
+    from datetime import timedelta
+    from production import production_plan, PlanRangeError
+    
+    start = start or date.today()
+    end = end or start + timedelta(days=6)
+    try:
+        return production_plan(db, start, end)
+    except PlanRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Composite dashboard: stats, revenue analytics and the pending queue in one round trip
+def dashboard_version(db: Session) -> str:
+    """One query fingerprinting everything the dashboard shows"""
+    from sqlalchemy import select, func, case
+    import hashlib
+    # Live orders only: archiving changes their count, and the archive itself is never edited
+    row = db.execute(select(
+        select(func.count(Order.id)).scalar_subquery(),
+        select(func.max(Order.updated_at)).scalar_subquery(),
+        select(func.count(Review.id)).scalar_subquery(),
+        select(func.sum(case((Review.approved == True, 1), else_=0))).scalar_subquery(),
+        select(func.count(Cookie.id)).scalar_subquery(),
+    )).one()
+    # The date is part of the version: "last 7 days" and "this month" roll over without writes
+    fingerprint = repr((date.today(), tuple(row)))
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+@router.get("/dashboard")
+@query_budget(14)
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Everything the dashboard/analytics pages need; 304 when nothing changed"""
+    import asyncio
+    from main import apply_http_caching, get_cache, set_cache
+    
+    version = await asyncio.to_thread(dashboard_version, db)
+    not_modified = apply_http_caching(request, response, "dashboard", version)
+    if not_modified is not None:
+        return not_modified
+    cached = get_cache("analytics:dashboard")
+    if cached is not None and cached["version"] == version:
+        return cached
+    
+    def database_sections():
+        # One session = one connection, which runs one statement at a time
+        sections = {
+            "stats": get_stats(db=db, admin=admin),
+            "pending_orders": get_admin_orders(status="pending", include_archived=False, fields=None, db=db, admin=admin),
+        }
+        if not columnar_enabled():
+            sections["analytics"] = get_revenue_analytics(db=db, admin=admin)
+        return sections
+    
+    if columnar_enabled():
+        # The in-memory snapshot needs no connection, so it runs alongside the queries
+        sections, analytics = await asyncio.gather(
+            asyncio.to_thread(database_sections),
+            asyncio.to_thread(snapshot.revenue_summary)
+        )
+        sections["analytics"] = analytics
+    else:
+        sections = await asyncio.to_thread(database_sections)
+    
+    result = {"version": version, **sections}
+    set_cache("analytics:dashboard", result)
+    return result
+
 # Review Management
 @router.get("/reviews")
-def get_all_reviews(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+@query_budget(1)
+def get_all_reviews(db: Session = Depends(get_read_db), admin: str = Depends(get_current_admin)):
     return db.query(Review).order_by(Review.created_at.desc()).all()
 
+class ReviewBulkFilter(BaseModel):
+    approved: Optional[bool] = None
+    cookie_name: Optional[str] = None
+    max_rating: Optional[int] = None
+    created_after: Optional[datetime] = None
+    contains: Optional[str] = None  # Substring of the comment, e.g. a spam link
+
+class ReviewBulkAction(BaseModel):
+    action: str  # approve | reject (delete)
+    review_ids: Optional[List[int]] = None
+    filter: Optional[ReviewBulkFilter] = None
+
+def _publish_moderation(db: Session, approved: list, removed: list):
+    """Patch the public review caches in place; the menu's ratings reload in the background"""
+    from main import patch_review_caches, refresh_cache
+    patch_review_caches(db, approved, {r.id for r in removed})
+    if any(r.cookie_name for r in approved + removed):
+        refresh_cache("cookies")
+
 @router.put("/reviews/{review_id}/approve")
 def approve_review(
     review_id: int,
@@ -318,12 +760,11 @@ def approve_review(
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    review.approved = True
-    db.commit()
-    
-    # Invalidate reviews cache
-    from main import invalidate_cache
-    invalidate_cache("reviews")
+    if not review.approved:
+        review.approved = True
+        apply_review(db, review, +1)
+        db.commit()
+        _publish_moderation(db, [review], [])
     
     return {"message": "Review approved"}
 
@@ -337,12 +778,107 @@ def delete_review(
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
+    was_approved = review.approved
+    if was_approved:
+        apply_review(db, review, -1)
     db.delete(review)
     db.commit()
     
-    # Invalidate reviews cache
-    from main import invalidate_cache
-    invalidate_cache("reviews")
+    if was_approved:
+        _publish_moderation(db, [], [review])
     
     return {"message": "Review deleted"}
 
+@router.post("/reviews/bulk")
+@query_budget(12)
+def bulk_moderate_reviews(
+    bulk: ReviewBulkAction,
+    db: Session = Depends(get_db),
+    admin: str = Depends(get_current_admin)
+):
+    """Approve or reject many reviews with one UPDATE/DELETE ... RETURNING"""
+    from sqlalchemy import update, delete
+    from review_stats import apply_reviews_bulk
+    
+    if bulk.action not in ("approve", "reject"):
+        raise HTTPException(status_code=400, detail="action must be 'approve' or 'reject'")
+    conditions = []
+    if bulk.review_ids is not None:
+        if not bulk.review_ids or len(bulk.review_ids) > MAX_BULK_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_BULK_ITEMS} review ids")
+        conditions.append(Review.id.in_(bulk.review_ids))
+    if bulk.filter is not None:
+        f = bulk.filter
+        if f.approved is not None:
+            conditions.append(Review.approved == f.approved)
+        if f.cookie_name:
+            conditions.append(Review.cookie_name == f.cookie_name)
+        if f.max_rating is not None:
+            conditions.append(Review.rating <= f.max_rating)
+        if f.created_after:
+            conditions.append(Review.created_at >= f.created_after)
+        if f.contains:
+            conditions.append(Review.comment.contains(f.contains, autoescape=True))  # "%"/"_" are literal
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Provide review_ids or a filter")
+    
+    columns = (Review.id, Review.customer_name, Review.rating, Review.comment,
+               Review.cookie_name, Review.approved, Review.created_at)
+    if bulk.action == "approve":
+        rows = db.execute(
+            update(Review)
+            .where(*conditions, Review.approved == False)
+            .values(approved=True)
+            .returning(*columns)
+            .execution_options(synchronize_session=False)
+        ).all()
+        apply_reviews_bulk(db, rows, +1)
+        approved, removed = rows, []
+    else:
+        rows = db.execute(
+            delete(Review).where(*conditions).returning(*columns).execution_options(synchronize_session=False)
+        ).all()
+        removed = [r for r in rows if r.approved]
+        apply_reviews_bulk(db, removed, -1)
+        approved = []
+    db.commit()
+    
+    if approved or removed:
+        _publish_moderation(db, approved, removed)
+    logger.info("Bulk review moderation", extra={"action": bulk.action, "reviews": len(rows)})
+    return {"action": bulk.action, "affected": [r.id for r in rows]}
+
+# Diagnostics
+@router.get("/profile")
+@query_budget(0)
+async def profile_worker(
+    seconds: float = 10,
+    interval_ms: float = 10,
+    memory: bool = False,
+    top: int = 25,
+    idle: bool = False,
+    admin: str = Depends(get_current_admin)
+):
+    """Sample this worker's stacks for `seconds`. Collapsed stacks as a text file,
+    or JSON with the collapsed stacks and a tracemalloc top-N when memory=true"""
+    import asyncio
+    from fastapi.responses import PlainTextResponse
+    from profiler import profile, ProfilerBusy, MAX_PROFILE_SECONDS
+    
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {MAX_PROFILE_SECONDS}")
+    if not 1 <= top <= 200:
+        raise HTTPException(status_code=400, detail="top must be between 1 and 200")
+    try:
+        # Sampled from a thread so the event loop keeps serving (and shows up in the profile)
+        result = await asyncio.to_thread(profile, seconds, interval_ms, memory, top, idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info("Worker profiled", extra={"pid": result["pid"], "seconds": result["seconds"], "samples": result["samples"]})
+    if memory:
+        return result
+    filename = f"profile_{result['pid']}_{datetime.utcnow():%Y%m%d_%H%M%S}.collapsed"
+    return PlainTextResponse(result["collapsed"], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Samples": str(result["samples"]),
+    })
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+import itertools
+import os
+from typing import Optional
+
+from database import POOL_SIZE, MAX_OVERFLOW
+from app_logging import get_logger
+
+# Admission control in front of DB-backed routes. At most ADMISSION_LIMIT requests
+# run at once (by default the pool's full capacity); the rest wait in a bounded
+# priority queue with a per-class deadline and are turned away with a 503 instead
+# of piling up behind the pool timeout.
+ADMISSION_LIMIT = int(os.getenv("ADMISSION_LIMIT", POOL_SIZE + MAX_OVERFLOW))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 50))
+
+# (priority, max wait in seconds); lower priority value is served first
+REQUEST_CLASSES = {
+    "checkout": (0, 5.0),
+    "default": (1, 2.0),
+    "analytics": (2, 0.5),
+}
+
+logger = get_logger("admission")
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """Map a request to its admission class, or None for routes that skip admission"""
+    if not path.startswith("/api/"):
+        return None
+    if method == "POST" and path == "/api/orders":
+        return "checkout"
+    if path.startswith("/api/admin/analytics") or path in ("/api/admin/stats", "/api/admin/dashboard"):
+        return "analytics"
+    return "default"
+
+class AdmissionController:
+    """Priority semaphore living on the event loop (no locking needed)"""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.admitted = {name: 0 for name in REQUEST_CLASSES}
+        self.rejected = {name: 0 for name in REQUEST_CLASSES}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, request_class: str) -> bool:
+        priority, max_wait = REQUEST_CLASSES[request_class]
+        if self.in_flight < self.limit and not self.queue_depth:
+            self.in_flight += 1
+            self.admitted[request_class] += 1
+            return True
+        if self.queue_depth >= self.max_queue:
+            return self._reject(request_class, "queue full")
+
+        entry = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        fut = entry[2]
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=max_wait)
+        except asyncio.TimeoutError:
+            if not fut.done():
+                self._abandon(entry)
+                return self._reject(request_class, "wait deadline")
+        except asyncio.CancelledError:
+            # Client went away while queued: leave the queue, or pass on a slot already handed over
+            if fut.done():
+                self.release()
+            else:
+                self._abandon(entry)
+            raise
+        self.admitted[request_class] += 1
+        return True
+
+    def _abandon(self, entry):
+        entry[2].cancel()
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+
+    def release(self):
+        # Hand the slot straight to the best waiter so nobody can barge in between
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def _reject(self, request_class: str, reason: str) -> bool:
+        self.rejected[request_class] += 1
+        logger.warning("Request rejected by admission control", extra={"class": request_class, "reason": reason})
+        return False
+
+    def metrics(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+        }
+
+admission = AdmissionController(ADMISSION_LIMIT, ADMISSION_MAX_QUEUE)
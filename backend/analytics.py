@@ -0,0 +1,151 @@
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+
+# Time-series analytics bucketed in the bakery's local time
+BUSINESS_TIMEZONE = os.getenv("BUSINESS_TIMEZONE", "Asia/Manila")
+GRANULARITIES = ("hour", "day", "week", "month")
+GROUP_COLUMNS = {
+    "none": None,
+    "cookie": "cookie_name",
+    "source": "order_source",
+    "payment_method": "payment_method",
+}
+REVENUE_STATUSES = ["completed", "out_for_delivery", "confirmed", "preparing"]
+MAX_BUCKETS = 5000
+
+class AnalyticsQueryError(ValueError):
+    pass
+
+def _truncate(moment: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return moment - timedelta(days=moment.weekday())  # Monday, like date_trunc('week')
+    if granularity == "month":
+        return moment.replace(day=1)
+    return moment
+
+def _next_bucket(bucket: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return bucket + timedelta(hours=1)
+    if granularity == "day":
+        return bucket + timedelta(days=1)
+    if granularity == "week":
+        return bucket + timedelta(weeks=1)
+    return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _bucket_range(start: date, end: date, granularity: str) -> list:
+    buckets = []
+    bucket = _truncate(datetime.combine(start, time.min), granularity)
+    stop = datetime.combine(end + timedelta(days=1), time.min)
+    while bucket < stop:
+        buckets.append(bucket)
+        if len(buckets) > MAX_BUCKETS:
+            raise AnalyticsQueryError(f"Range too large for '{granularity}' granularity")
+        bucket = _next_bucket(bucket, granularity)
+    return buckets
+
+def _utc_bounds(start: date, end: date, tz: ZoneInfo):
+    """Local business-day bounds as naive UTC, matching how created_at is stored"""
+    def to_utc(day: date) -> datetime:
+        return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+    return to_utc(start), to_utc(end + timedelta(days=1))
+
+def _sql_rows(db: Session, source, granularity: str, group_column, lower: datetime, upper: datetime):
+    # Postgres: bucket in the database with date_trunc over the indexed created_at range
+    local_time = func.timezone(BUSINESS_TIMEZONE, func.timezone("UTC", source.created_at))
+    columns = [func.date_trunc(granularity, local_time).label("bucket")]
+    group_names = ["bucket"]
+    if group_column is not None:
+        columns.append(group_column.label("grp"))
+        group_names.append("grp")
+    rows = db.query(
+        *columns, func.sum(source.total_price), func.count(source.id), func.sum(source.quantity)
+    ).filter(
+        source.created_at >= lower,
+        source.created_at < upper,
+        source.status.in_(REVENUE_STATUSES)
+    ).group_by(*[text(name) for name in group_names]).all()
+    if group_column is None:
+        return [(bucket, None, revenue, count, quantity) for bucket, revenue, count, quantity in rows]
+    return rows
+
+def _python_rows(db: Session, source, granularity: str, group_column, tz: ZoneInfo, lower: datetime, upper: datetime):
+    # Other databases: same range scan, bucketed here
+    columns = [source.created_at, source.total_price, source.quantity]
+    if group_column is not None:
+        columns.append(group_column)
+    rows = db.query(*columns).filter(
+        source.created_at >= lower,
+        source.created_at < upper,
+        source.status.in_(REVENUE_STATUSES)
+    ).all()
+    totals = {}
+    for row in rows:
+        created_at, total_price, quantity = row[:3]
+        grp = row[3] if group_column is not None else None
+        local = created_at.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+        key = (_truncate(local, granularity), grp)
+        revenue, count, qty = totals.get(key, (0.0, 0, 0))
+        totals[key] = (revenue + (total_price or 0), count + 1, qty + (quantity or 0))
+    return [(bucket, grp, *values) for (bucket, grp), values in totals.items()]
+
+def timeseries_params(start: date, end: date, granularity: str, group_by: str):
+    """Validate a request and return (buckets, lower, upper) in naive UTC for created_at"""
+    if granularity not in GRANULARITIES:
+        raise AnalyticsQueryError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if group_by not in GROUP_COLUMNS:
+        raise AnalyticsQueryError(f"group_by must be one of {', '.join(GROUP_COLUMNS)}")
+    if end < start:
+        raise AnalyticsQueryError("end must not be before start")
+    buckets = _bucket_range(start, end, granularity)
+    lower, upper = _utc_bounds(start, end, ZoneInfo(BUSINESS_TIMEZONE))
+    return buckets, lower, upper
+
+def build_series(rows, buckets: list, start: date, end: date, granularity: str, group_by: str) -> dict:
+    """Zero-fill (bucket, group, revenue, count, quantity) rows into the response shape"""
+    values = {}
+    for bucket, grp, revenue, count, quantity in rows:
+        grp = grp if group_by != "none" else "all"
+        values.setdefault(grp or "unknown", {})[bucket.replace(tzinfo=None)] = (revenue, count, quantity)
+    if not values and group_by == "none":
+        values["all"] = {}
+
+    series = []
+    for grp in sorted(values):
+        points = []
+        for bucket in buckets:
+            revenue, count, quantity = values[grp].get(bucket, (0, 0, 0))
+            points.append({
+                "bucket": bucket.isoformat(),
+                "revenue": float(revenue or 0),
+                "order_count": int(count or 0),
+                "quantity": int(quantity or 0)
+            })
+        series.append({"group": grp, "points": points})
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "granularity": granularity,
+        "group_by": group_by,
+        "timezone": BUSINESS_TIMEZONE,
+        "series": series
+    }
+
+def revenue_timeseries(db: Session, start: date, end: date, granularity: str = "day", group_by: str = "none") -> dict:
+    from archive import order_history
+    buckets, lower, upper = timeseries_params(start, end, granularity, group_by)
+    # Live + archived orders; the created_at range is pushed into both tables' indexes
+    source = order_history()
+    group_column = getattr(source, GROUP_COLUMNS[group_by]) if GROUP_COLUMNS[group_by] else None
+    if db.get_bind().dialect.name == "postgresql":
+        rows = _sql_rows(db, source, granularity, group_column, lower, upper)
+    else:
+        rows = _python_rows(db, source, granularity, group_column, ZoneInfo(BUSINESS_TIMEZONE), lower, upper)
+    return build_series(rows, buckets, start, end, granularity, group_by)
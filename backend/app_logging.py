@@ -0,0 +1,82 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# Structured JSON logging. Records are handed to a background thread through a
+# queue so request handlers never block on stdout.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of DEBUG/INFO records to keep (warnings and errors are never sampled out)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from `extra=` and is emitted as a field
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the request ID and applies sampling on the calling thread"""
+    def filter(self, record):
+        if record.levelno < logging.WARNING and LOG_SAMPLE_RATE < 1.0 and random.random() >= LOG_SAMPLE_RATE:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Only resolve the message here; JSON encoding happens on the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(JsonFormatter())
+_listener = logging.handlers.QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+
+_queue_handler = NonBlockingQueueHandler(_log_queue)
+_queue_handler.addFilter(RequestContextFilter())
+
+_app_logger = logging.getLogger("cookie")
+_app_logger.setLevel(LOG_LEVEL)
+_app_logger.addHandler(_queue_handler)
+_app_logger.propagate = False
+
+_listener.start()
+atexit.register(_listener.stop)
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a child of the app logger, e.g. get_logger("orders") -> cookie.orders"""
+    return _app_logger.getChild(name)
@@ -0,0 +1,77 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, union_all, literal
+from sqlalchemy.orm import Session, aliased
+
+from models import Order, ArchivedOrder, OrderFields
+from idempotency import purge_expired
+from app_logging import get_logger
+
+# Closed orders older than ARCHIVE_AFTER_DAYS move to orders_archive in small batches,
+# so the live orders table (pending queue, status counts) stays small. 0 disables.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+CLOSED_STATUSES = ["completed", "cancelled"]
+ORDER_COLUMNS = [name for name in vars(OrderFields) if not name.startswith("_")]
+
+logger = get_logger("archive")
+
+def order_history():
+    """Order-shaped alias over live + archived orders, for history-wide queries"""
+    history = union_all(
+        select(*[getattr(Order, c) for c in ORDER_COLUMNS]),
+        select(*[getattr(ArchivedOrder, c) for c in ORDER_COLUMNS]),
+    ).subquery("order_history")
+    return aliased(Order, history)
+
+def archive_batch(db: Session, cutoff: datetime) -> int:
+    """Move up to ARCHIVE_BATCH_SIZE closed orders last touched before cutoff"""
+    ids = db.execute(
+        select(Order.id)
+        .where(Order.status.in_(CLOSED_STATUSES), Order.updated_at < cutoff)
+        .order_by(Order.id)
+        .limit(ARCHIVE_BATCH_SIZE)
+    ).scalars().all()
+    if not ids:
+        return 0
+    db.execute(
+        insert(ArchivedOrder).from_select(
+            ORDER_COLUMNS + ["archived_at"],
+            select(*[getattr(Order, c) for c in ORDER_COLUMNS], literal(datetime.utcnow())).where(Order.id.in_(ids))
+        )
+    )
+    db.execute(delete(Order).where(Order.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+def archive_closed_orders(db: Session) -> int:
+    """Archive everything eligible, one committed batch at a time"""
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    total = 0
+    while True:
+        moved = archive_batch(db, cutoff)
+        total += moved
+        if moved < ARCHIVE_BATCH_SIZE:
+            break
+    if total:
+        logger.info("Archived closed orders", extra={"orders": total, "cutoff": cutoff.isoformat()})
+    return total
+
+async def archive_loop(session_factory):
+    """Run on the elected leader; short batches keep lock times low for live traffic"""
+    while True:
+        db = session_factory()
+        try:
+            await asyncio.to_thread(archive_closed_orders, db)
+            # Expired idempotency keys are swept on the same pass
+            await asyncio.to_thread(purge_expired, db)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Order archival failed", extra={"error": str(e)})
+        finally:
+            db.close()
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,78 @@
+"""Benchmark the columnar analytics snapshot against the SQL path.
+
+Usage: python bench_analytics.py [orders]   (default 2,000,000 synthetic orders)
+The SQL timings use whatever orders are in the configured database.
+"""
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from database import SessionLocal
+from columnar import OrderSnapshot, COLUMN_TYPES, _epoch
+from analytics import revenue_timeseries
+
+def timed(label, fn, repeat=5):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"  {label:<34} {(time.perf_counter() - started) / repeat * 1000:8.1f} ms")
+
+def synthetic_snapshot(count: int) -> OrderSnapshot:
+    rng = np.random.default_rng(42)
+    snap = OrderSnapshot()
+    for name in ("Classic Belgian", "Red Velvet", "Biscoff Campfire", "Chocobomb Walnut", "Alcapone Cookie"):
+        snap.dictionaries["cookie"].encode(name)
+    for name in ("pending", "confirmed", "preparing", "out_for_delivery", "completed", "cancelled"):
+        snap.dictionaries["status"].encode(name)
+    for name in ("website", "discord"):
+        snap.dictionaries["source"].encode(name)
+    for name in ("cod", "gcash"):
+        snap.dictionaries["payment"].encode(name)
+
+    now = _epoch(datetime.utcnow())
+    quantity = rng.integers(1, 13, count)
+    columns = {
+        "id": np.arange(1, count + 1),
+        "created": np.sort(rng.integers(now - 2 * 365 * 86400, now, count)),
+        "cookie": rng.integers(1, len(snap.dictionaries["cookie"].values), count),
+        "status": rng.integers(2, len(snap.dictionaries["status"].values), count),
+        "source": rng.integers(1, 3, count),
+        "payment": rng.integers(1, 3, count),
+        "quantity": quantity,
+        "price": quantity * 150.0,
+    }
+    snap._ensure_capacity(count)
+    for name, dtype in COLUMN_TYPES.items():
+        snap.columns[name][:count] = columns[name].astype(dtype)
+    snap.size = count
+    snap.ready = True
+    return snap
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    today = date.today()
+
+    print(f"📊 Columnar snapshot, {count:,} synthetic orders")
+    started = time.perf_counter()
+    snap = synthetic_snapshot(count)
+    print(f"  {'build':<34} {(time.perf_counter() - started) * 1000:8.1f} ms")
+    print(f"  {'memory':<34} {snap.nbytes / 1024 / 1024:8.1f} MB")
+    timed("revenue summary", snap.revenue_summary)
+    timed("30 days by day", lambda: snap.timeseries(today - timedelta(days=29), today))
+    timed("1 year by week, per cookie", lambda: snap.timeseries(today - timedelta(days=364), today, "week", "cookie"))
+    timed("200 days by hour", lambda: snap.timeseries(today - timedelta(days=200), today, "hour"))
+
+    db = SessionLocal()
+    try:
+        from models import Order
+        print(f"🗄️  SQL path, {db.query(Order).count():,} orders in the database")
+        timed("30 days by day", lambda: revenue_timeseries(db, today - timedelta(days=29), today))
+        timed("1 year by week, per cookie", lambda: revenue_timeseries(db, today - timedelta(days=364), today, "week", "cookie"))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
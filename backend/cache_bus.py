@@ -0,0 +1,151 @@
+import os
+import queue
+import select
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from database import engine
+from app_logging import get_logger
+
+# Cross-worker cache invalidation. Writers publish a namespace ("cookies",
+# "reviews", ...); every worker's subscribers evict it. On Postgres this rides on
+# LISTEN/NOTIFY; otherwise (or with CACHE_BUS=local, e.g. tests) it is in-process only.
+CHANNEL = "cache_invalidation"
+CACHE_BUS = os.getenv("CACHE_BUS", "auto")
+
+logger = get_logger("cache_bus")
+
+class LocalBus:
+    """In-process stand-in: publish calls subscribers directly"""
+    cross_process = False
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, handler):
+        self._subscribers.append(handler)
+
+    def _dispatch(self, namespace: str):
+        for handler in self._subscribers:
+            try:
+                handler(namespace)
+            except Exception as e:
+                logger.warning("Cache invalidation handler failed", extra={"namespace": namespace, "error": str(e)})
+
+    def publish(self, namespace: str, local: bool = True):
+        if local:
+            self._dispatch(namespace)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+class PostgresBus(LocalBus):
+    """Evicts locally, then NOTIFYs the other workers; a listener thread applies theirs.
+
+    NOTIFYs go out from a sender thread on its own connection, so publishing never
+    takes a connection from the request pool or waits on the database.
+    """
+    cross_process = True
+
+    def __init__(self):
+        super().__init__()
+        self._listen_engine = create_engine(engine.url, poolclass=NullPool)
+        self._stopped = threading.Event()
+        self._thread = None
+        self._outbox = queue.Queue()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+
+    def publish(self, namespace: str, local: bool = True):
+        if local:
+            self._dispatch(namespace)
+        self._outbox.put(namespace)
+        with self._sender_lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_forever, name="cache-bus-notify", daemon=True)
+                self._sender.start()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen_forever, name="cache-bus", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._outbox.put(None)
+
+    def _send_forever(self):
+        raw = None
+        while not self._stopped.is_set():
+            namespace = self._outbox.get()
+            if namespace is None:
+                break
+            # Send everything queued meanwhile too, once per namespace
+            batch = [namespace]
+            while True:
+                try:
+                    namespace = self._outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if namespace is not None and namespace not in batch:
+                    batch.append(namespace)
+            try:
+                if raw is None:
+                    raw = self._listen_engine.raw_connection()
+                    raw.driver_connection.autocommit = True
+                cursor = raw.driver_connection.cursor()
+                for namespace in batch:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, f"{os.getpid()}:{namespace}"))
+                cursor.close()
+            except Exception as e:
+                logger.warning("Cache invalidation NOTIFY failed", extra={"namespaces": batch, "error": str(e)})
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+                    raw = None
+                time.sleep(1)
+        if raw is not None:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def _listen_forever(self):
+        while not self._stopped.is_set():
+            raw = None
+            try:
+                raw = self._listen_engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                # Anything published while we were disconnected is lost: start clean
+                self._dispatch("")
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        pid, _, namespace = conn.notifies.pop(0).payload.partition(":")
+                        if pid != str(os.getpid()):
+                            self._dispatch(namespace)
+            except Exception as e:
+                logger.warning("Cache invalidation listener disconnected", extra={"error": str(e)})
+                time.sleep(2)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+if CACHE_BUS == "postgres" or (CACHE_BUS == "auto" and engine.dialect.name == "postgresql"):
+    bus = PostgresBus()
+else:
+    bus = LocalBus()
@@ -0,0 +1,289 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+
+from models import Order
+from archive import order_history
+from analytics import BUSINESS_TIMEZONE, REVENUE_STATUSES, timeseries_params, build_series
+from app_logging import get_logger
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the SQL analytics path is used without it
+    np = None
+
+# Optional in-memory columnar copy of the orders table for analytics.
+# Enabled with ANALYTICS_ENGINE=columnar; kept current from updated_at watermarks.
+# 32 bytes per order, so a million orders is roughly 32 MB.
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql")
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", 10))
+# Deletions don't move updated_at, so other workers pick them up on the periodic full reload
+SNAPSHOT_FULL_RELOAD_SECONDS = int(os.getenv("SNAPSHOT_FULL_RELOAD_SECONDS", 3600))
+# Re-read rows a little before the watermark to catch transactions that committed late
+WATERMARK_OVERLAP = timedelta(seconds=5)
+FETCH_BATCH = 50000
+
+# Dictionary codes are int32: cookie, source, payment and status are free text on
+# POST /api/orders, so the number of distinct values is up to the clients.
+COLUMN_TYPES = {
+    "id": "int32",
+    "created": "uint32",   # Epoch seconds (UTC)
+    "cookie": "int32",
+    "status": "int32",
+    "source": "int32",
+    "payment": "int32",
+    "quantity": "int32",
+    "price": "float32",
+}
+
+logger = get_logger("columnar")
+
+def _epoch(moment: datetime) -> int:
+    """Naive UTC datetime (as stored in created_at) -> epoch seconds"""
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+class _Dictionary:
+    """String <-> small integer code; code 0 is reserved for NULL"""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def codes_for(self, values) -> list:
+        return [self.codes[v] for v in values if v in self.codes]
+
+class OrderSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.size = 0
+        self.columns = {name: np.empty(1024, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+        self.dictionaries = {name: _Dictionary() for name in ("cookie", "status", "source", "payment")}
+        self.deleted_code = self.dictionaries["status"].encode("__deleted__")
+        self.watermark = None
+        self.full_loaded_at = 0.0
+        self.ready = False
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col[:self.size].nbytes for col in self.columns.values())
+
+    # --- Loading ---
+
+    def refresh(self, db: Session):
+        """Pull rows changed since the watermark (everything on the first/periodic full load)"""
+        def query(source):
+            return db.query(
+                source.id, source.created_at, source.cookie_name, source.status, source.order_source,
+                source.payment_method, source.quantity, source.total_price, source.updated_at
+            ).order_by(source.id)
+
+        if not self.ready or time.time() - self.full_loaded_at > SNAPSHOT_FULL_RELOAD_SECONDS:
+            # Build a fresh copy off to the side so queries keep using the old one meanwhile.
+            # Archived orders only change by moving, so they are read on full loads alone.
+            fresh = OrderSnapshot()
+            fresh._load(query(order_history()).yield_per(FETCH_BATCH))
+            fresh.full_loaded_at = time.time()
+            fresh.ready = True
+            with self._lock:
+                self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != "_lock"})
+            return
+
+        rows = query(Order).filter(Order.updated_at >= self.watermark - WATERMARK_OVERLAP).all() if self.watermark else query(Order).all()
+        with self._lock:
+            self._load(rows)
+
+    def _load(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if row.updated_at and (self.watermark is None or row.updated_at > self.watermark):
+                self.watermark = row.updated_at
+            if len(batch) >= FETCH_BATCH:
+                self._apply(batch)
+                batch = []
+        if batch:
+            self._apply(batch)
+
+    def _apply(self, rows):
+        d = self.dictionaries
+        values = {
+            "id": (r.id for r in rows),
+            "created": (_epoch(r.created_at) if r.created_at else 0 for r in rows),
+            "cookie": (d["cookie"].encode(r.cookie_name) for r in rows),
+            "status": (d["status"].encode(r.status) for r in rows),
+            "source": (d["source"].encode(r.order_source) for r in rows),
+            "payment": (d["payment"].encode(r.payment_method) for r in rows),
+            "quantity": (r.quantity or 0 for r in rows),
+            "price": (r.total_price or 0 for r in rows),
+        }
+        batch = {name: np.fromiter(values[name], dtype=dtype, count=len(rows)) for name, dtype in COLUMN_TYPES.items()}
+
+        # Rows we already hold are overwritten in place (ids are kept sorted)
+        ids = self.columns["id"][:self.size]
+        pos = np.searchsorted(ids, batch["id"])
+        known = pos < self.size
+        known[known] = ids[pos[known]] == batch["id"][known]
+        for name, values in batch.items():
+            self.columns[name][pos[known]] = values[known]
+
+        new = ~known
+        count = int(new.sum())
+        if not count:
+            return
+        self._ensure_capacity(self.size + count)
+        previous_max = ids[-1] if self.size else -1
+        for name, values in batch.items():
+            self.columns[name][self.size:self.size + count] = values[new]
+        self.size += count
+        if batch["id"][new].min() < previous_max:
+            # A late-committed lower id: restore id order
+            order = np.argsort(self.columns["id"][:self.size], kind="stable")
+            for name in self.columns:
+                self.columns[name][:self.size] = self.columns[name][:self.size][order]
+
+    def _ensure_capacity(self, needed: int):
+        capacity = len(self.columns["id"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self.columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self.size] = col[:self.size]
+            self.columns[name] = grown
+
+    def forget(self, order_id: int):
+        """Drop a deleted order immediately in this worker"""
+        with self._lock:
+            ids = self.columns["id"][:self.size]
+            pos = np.searchsorted(ids, order_id)
+            if pos < self.size and ids[pos] == order_id:
+                self.columns["status"][pos] = self.deleted_code
+
+    # --- Queries ---
+
+    def _view(self) -> dict:
+        return {name: col[:self.size] for name, col in self.columns.items()}
+
+    def _status_mask(self, status, statuses, negate=False):
+        mask = np.isin(status, self.dictionaries["status"].codes_for(statuses))
+        if negate:
+            return ~mask & (status != self.deleted_code)
+        return mask
+
+    def revenue_summary(self) -> dict:
+        """Same response as GET /api/admin/analytics/revenue, computed with vectorized reductions"""
+        with self._lock:
+            v = self._view()
+            price = v["price"].astype("float64")
+            status = v["status"]
+            booked = self._status_mask(status, ["completed", "out_for_delivery"])
+            not_cancelled = self._status_mask(status, ["cancelled"], negate=True)
+            active = self._status_mask(status, REVENUE_STATUSES)
+
+            cookie_names = self.dictionaries["cookie"].values
+            sold = np.bincount(v["cookie"][active], weights=v["quantity"][active], minlength=len(cookie_names))
+            cookie_revenue = np.bincount(v["cookie"][active], weights=price[active], minlength=len(cookie_names))
+            top = [code for code in np.argsort(-sold, kind="stable")[:5] if sold[code] > 0]
+
+            # Mirrors the SQL path: day buckets on the stored (UTC) timestamp, server-local "now"
+            now = datetime.now()
+            recent = active & (v["created"] >= _epoch(now - timedelta(days=7)))
+            days = (v["created"][recent] // 86400).astype("int64")
+            unique_days, day_index = np.unique(days, return_inverse=True)
+            day_revenue = np.bincount(day_index, weights=price[recent], minlength=len(unique_days))
+            day_orders = np.bincount(day_index, minlength=len(unique_days))
+
+            month_start = _epoch(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+            this_month = v["created"] >= month_start
+
+            return {
+                "total_revenue": float(price[booked].sum()),
+                "average_order_value": float(price[not_cancelled].mean()) if not_cancelled.any() else 0.0,
+                "monthly_revenue": float(price[booked & this_month].sum()),
+                "monthly_orders": int((not_cancelled & this_month).sum()),
+                "best_sellers": [
+                    {
+                        "cookie_name": cookie_names[code],
+                        "total_sold": int(sold[code]),
+                        "revenue": float(cookie_revenue[code])
+                    } for code in top
+                ],
+                "daily_sales": [
+                    {
+                        "date": (date(1970, 1, 1) + timedelta(days=int(day))).isoformat(),
+                        "revenue": float(day_revenue[i]),
+                        "order_count": int(day_orders[i])
+                    } for i, day in enumerate(unique_days)
+                ]
+            }
+
+    def timeseries(self, start: date, end: date, granularity: str = "day", group_by: str = "none") -> dict:
+        """Same response as analytics.revenue_timeseries via one bincount per measure"""
+        buckets, lower, upper = timeseries_params(start, end, granularity, group_by)
+        tz = ZoneInfo(BUSINESS_TIMEZONE)
+        # Bucket edges converted to UTC individually, so DST changes land exactly
+        edges = np.array([int(b.replace(tzinfo=tz).timestamp()) for b in buckets], dtype="int64")
+        group_key = {"cookie": "cookie", "source": "source", "payment_method": "payment"}.get(group_by)
+
+        with self._lock:
+            v = self._view()
+            created = v["created"].astype("int64")
+            mask = (created >= _epoch(lower)) & (created < _epoch(upper)) & self._status_mask(v["status"], REVENUE_STATUSES)
+            bucket_index = np.searchsorted(edges, created[mask], side="right") - 1
+            groups = v[group_key][mask].astype("int64") if group_key else np.zeros(int(mask.sum()), dtype="int64")
+            labels = self.dictionaries[group_key].values if group_key else [None]
+
+            n = len(buckets)
+            # Only the (group, bucket) pairs that occur get a slot; there may be many groups
+            keys, slot = np.unique(groups * n + bucket_index, return_inverse=True)
+            revenue = np.bincount(slot, weights=v["price"][mask], minlength=len(keys))
+            orders = np.bincount(slot, minlength=len(keys))
+            quantity = np.bincount(slot, weights=v["quantity"][mask], minlength=len(keys))
+
+        rows = [
+            (buckets[k % n], labels[k // n], revenue[i], orders[i], quantity[i])
+            for i, k in enumerate(keys.tolist())
+        ]
+        return build_series(rows, buckets, start, end, granularity, group_by)
+
+snapshot = OrderSnapshot() if np is not None else None
+
+def columnar_enabled() -> bool:
+    return ANALYTICS_ENGINE == "columnar" and snapshot is not None and snapshot.ready
+
+async def snapshot_refresh_loop(session_factory):
+    import asyncio
+    if ANALYTICS_ENGINE != "columnar":
+        return
+    if snapshot is None:
+        logger.warning("ANALYTICS_ENGINE=columnar needs numpy; using SQL analytics")
+        return
+    while True:
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            await asyncio.to_thread(snapshot.refresh, db)
+            logger.debug("Order snapshot refreshed", extra={
+                "orders": snapshot.size, "bytes": snapshot.nbytes,
+                "ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+        except Exception as e:
+            logger.warning("Order snapshot refresh failed", extra={"error": str(e)})
+        finally:
+            db.close()
+        await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
@@ -0,0 +1,118 @@
+import base64
+import re
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, case, and_, or_, tuple_
+from sqlalchemy.orm import Session, load_only
+
+# Customer lookup over the whole order history (live + archived).
+# Contacts are matched on a normalized form so "0917 123 4567", "+63 917-123-4567"
+# and "639171234567" are the same customer.
+COUNTRY_CODE = "63"
+MIN_CONTACT_DIGITS = 3  # Shorter digit queries are treated as names
+MAX_SEARCH_LIMIT = 100
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_QUERY = re.compile(r"^[\d\s+().-]+$")
+
+class SearchError(ValueError):
+    pass
+
+def normalize_contact(contact: Optional[str]) -> Optional[str]:
+    """Digits of the national number ("" when the contact has none)"""
+    if contact is None:
+        return None
+    digits = _NON_DIGITS.sub("", contact)
+    if digits.startswith(COUNTRY_CODE) and len(digits) == 12:
+        digits = digits[len(COUNTRY_CODE):]
+    elif digits.startswith("0") and len(digits) == 11:
+        digits = digits[1:]
+    return digits
+
+def _contact_query_prefix(q: str) -> str:
+    """Normalize a partial number typed by staff ("0917", "+63 917", "63917…")"""
+    digits = _NON_DIGITS.sub("", q)
+    if (q.lstrip().startswith("+") or len(digits) == 12) and digits.startswith(COUNTRY_CODE):
+        return digits[len(COUNTRY_CODE):]
+    return digits[1:] if digits.startswith("0") else digits
+
+def _is_contact_query(q: str) -> bool:
+    return bool(_PHONE_QUERY.match(q)) and len(_NON_DIGITS.sub("", q)) >= MIN_CONTACT_DIGITS
+
+def _contact_prefix(column, prefix: str):
+    # A range instead of LIKE: any plain btree serves it, whatever the collation.
+    # Digit-only values starting with `prefix` sort between it and prefix + "999…".
+    return and_(column >= prefix, column <= prefix + "9" * 20)
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{order_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise SearchError("Invalid cursor")
+
+def search_orders(db: Session, source, q: str, columns: list, limit: int = 25, cursor: Optional[str] = None) -> dict:
+    """Newest-first orders whose contact starts with (or customer/cookie name contains) `q`, keyset paged"""
+    q = (q or "").strip()
+    if not q:
+        raise SearchError("Search text is required")
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        raise SearchError(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+
+    if _is_contact_query(q):
+        # Prefix of the normalized number, so "0917" and "+63917" match the same rows
+        condition = _contact_prefix(source.contact_normalized, _contact_query_prefix(q))
+    else:
+        # Served by the pg_trgm indexes on lower(customer_name) and lower(cookie_name) (a scan on SQLite)
+        condition = or_(
+            func.lower(source.customer_name).contains(q.lower(), autoescape=True),
+            func.lower(source.cookie_name).contains(q.lower(), autoescape=True),
+        )
+
+    query = db.query(source).options(load_only(*[getattr(source, c) for c in columns])).filter(condition)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(tuple_(source.created_at, source.id) < tuple_(created_at, order_id))
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = query.order_by(source.created_at.desc(), source.id.desc()).limit(limit + 1).all()
+
+    page = rows[:limit]
+    return {
+        "orders": [{c: getattr(order, c) for c in columns} for order in page],
+        "next_cursor": encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None,
+    }
+
+def customer_summary(db: Session, source, contact: str) -> Optional[dict]:
+    """Order count, lifetime value and first/last order for one contact, in one aggregate"""
+    normalized = normalize_contact(contact)
+    if not normalized:
+        raise SearchError("Contact must contain digits")
+    not_cancelled = source.status != "cancelled"
+    latest_name = (
+        db.query(source.customer_name).filter(source.contact_normalized == normalized)
+        .order_by(source.created_at.desc()).limit(1).scalar_subquery()
+    )
+    row = db.query(
+        func.count(source.id),
+        func.sum(case((not_cancelled, 1), else_=0)),
+        func.sum(case((not_cancelled, source.total_price), else_=0)),
+        func.sum(case((not_cancelled, source.quantity), else_=0)),
+        func.min(source.created_at),
+        func.max(source.created_at),
+        latest_name,
+    ).filter(source.contact_normalized == normalized).one()
+    count, active, lifetime_value, cookies, first_order, last_order, name = row
+    if not count:
+        return None
+    return {
+        "contact": normalized,
+        "customer_name": name,  # As given on the latest order
+        "order_count": count,
+        "active_order_count": int(active or 0),
+        "lifetime_value": float(lifetime_value or 0),
+        "cookies_ordered": int(cookies or 0),
+        "first_order_at": first_order,
+        "last_order_at": last_order,
+    }
@@ -1,34 +1,80 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
 import os
+import time
+from contextvars import ContextVar
+from fastapi import Request
 from dotenv import load_dotenv
+from query_stats import instrument_engine
+from tracing import TracedQueuePool, trace_engine
+from app_logging import get_logger
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = get_logger("db")
 
-# Fix for Render PostgreSQL URL format (postgres:// -> postgresql://)
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+def _normalize_url(url):
+    # Fix for Render PostgreSQL URL format (postgres:// -> postgresql://)
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+DATABASE_URL = _normalize_url(os.getenv("DATABASE_URL"))
+# Optional read replica for read-only endpoints
+DATABASE_REPLICA_URL = _normalize_url(os.getenv("DATABASE_REPLICA_URL"))
+# After a client writes, its reads stay on the primary this long (read-your-writes)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+# How long to stop trying an unreachable replica
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", 30))
+STICKY_COOKIE = "db_primary_until"
+# Same deadline as a header the SPA echoes back (its API is on another origin, so no cookie)
+STICKY_HEADER = "X-Primary-Until"
 
 # Optimized connection pool settings for better performance
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=5,          # Maintain 5 connections
-    max_overflow=10,      # Allow up to 15 total connections
-    pool_pre_ping=True,   # Verify connections before use (prevents stale connections)
-    pool_recycle=3600,    # Recycle connections after 1 hour
-    connect_args={
-        "connect_timeout": 10,  # 10 second connection timeout
-        "options": "-c statement_timeout=30000"  # 30 second query timeout
-    }
-)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Fail fast instead of SQLAlchemy's 30s default; admission control queues in front of the pool
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+
+def is_sqlite(url) -> bool:
+    return bool(url) and str(url).startswith("sqlite")
+
+def _create_engine(url, connect_timeout: int):
+    pool_options = dict(
+        poolclass=TracedQueuePool,
+        pool_size=POOL_SIZE,          # Maintain 5 connections
+        max_overflow=MAX_OVERFLOW,    # Allow up to 15 total connections
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True,   # Verify connections before use (prevents stale connections)
+        pool_recycle=3600,    # Recycle connections after 1 hour
+    )
+    if is_sqlite(url):
+        # Embedded mode: WAL, tuned pragmas, serialized writes (see sqlite_support.py)
+        import sqlite_support
+        new_engine = create_engine(url, **sqlite_support.engine_options(url, pool_options))
+        sqlite_support.configure_engine(new_engine)
+    else:
+        new_engine = create_engine(url, **pool_options, connect_args={
+            "connect_timeout": connect_timeout,
+            "options": "-c statement_timeout=30000"  # 30 second query timeout
+        })
+    # Per-request query counting and slow query logging; SQL spans for sampled traces
+    instrument_engine(new_engine)
+    trace_engine(new_engine)
+    return new_engine
+
+engine = _create_engine(DATABASE_URL, connect_timeout=10)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = None
+ReplicaSessionLocal = None
+if DATABASE_REPLICA_URL:
+    replica_engine = _create_engine(DATABASE_REPLICA_URL, connect_timeout=3)  # Give up quickly and fall back to the primary
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -37,3 +83,53 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# --- Read replica routing ---
+
+# Per-request flag holder set by middleware; commits on the primary flip it
+_request_writes: ContextVar = ContextVar("request_writes", default=None)
+_replica_down_until = 0.0
+
+def track_request_writes() -> dict:
+    holder = {"wrote": False}
+    _request_writes.set(holder)
+    return holder
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_request_wrote(session):
+    holder = _request_writes.get()
+    if holder is not None:
+        holder["wrote"] = True
+
+def _wants_primary(request: Request) -> bool:
+    now = time.time()
+    for value in (request.headers.get(STICKY_HEADER), request.cookies.get(STICKY_COOKIE)):
+        try:
+            # A deadline further out than any we hand out is not ours
+            if value and now < float(value) <= now + REPLICA_STICKY_SECONDS:
+                return True
+        except ValueError:
+            pass
+    return False
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica when configured and healthy,
+    otherwise (or right after this client wrote) the primary"""
+    global _replica_down_until
+    if ReplicaSessionLocal is None or time.time() < _replica_down_until or _wants_primary(request):
+        yield from get_db()
+        return
+
+    db = ReplicaSessionLocal()
+    try:
+        db.connection()  # Check out now so an unreachable replica falls back here
+    except OperationalError as e:
+        db.close()
+        _replica_down_until = time.time() + REPLICA_RETRY_SECONDS
+        logger.warning("Read replica unreachable, using primary", extra={"error": str(e)})
+        yield from get_db()
+        return
+    try:
+        yield db
+    finally:
+        db.close()
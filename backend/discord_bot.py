@@ -5,7 +5,10 @@ import asyncio
 from database import SessionLocal
 from models import Order
 from sqlalchemy import func
-from datetime import datetime
+from datetime import datetime, timedelta
+from app_logging import get_logger
+
+logger = get_logger("bot")
 
 # Bot Setup
 intents = discord.Intents.default()
@@ -21,16 +24,16 @@ class CookieBot(discord.Client):
         await self.tree.sync()
     
     async def on_ready(self):
-        print(f'🤖 Bot Logged in as {self.user} (ID: {self.user.id})')
+        logger.info("Bot logged in", extra={"user": str(self.user), "user_id": self.user.id})
         # Attempt to find a channel to post to
         # 1. Look for env var
         cid = os.getenv("DISCORD_CHANNEL_ID")
         if cid:
             try:
                 self.notification_channel = await self.fetch_channel(int(cid))
-                print(f"✅ Configured to post in channel: {self.notification_channel.name}")
+                logger.info("Configured notification channel", extra={"channel": self.notification_channel.name})
             except Exception as e:
-                print(f"⚠️ Could not load configured channel: {e}")
+                logger.warning("Could not load configured channel", extra={"error": str(e)})
         
         # 2. If no env var, try to find the first text channel in the first guild (Fallback)
         if not self.notification_channel and self.guilds:
@@ -38,12 +41,22 @@ class CookieBot(discord.Client):
                 for channel in guild.text_channels:
                     if channel.permissions_for(guild.me).send_messages:
                         self.notification_channel = channel
-                        print(f"⚠️ No DISCORD_CHANNEL_ID set. Defaulting to: {channel.name} in {guild.name}")
+                        logger.warning("No DISCORD_CHANNEL_ID set, using fallback channel", extra={"channel": channel.name, "guild": guild.name})
                         break
                 if self.notification_channel: break
 
 client = CookieBot()
 
+async def start_bot(token: str):
+    """Log the bot in as a background task (called on the elected leader only)"""
+    if client.is_closed():
+        client.clear()  # Re-opened after a previous leadership term
+    asyncio.create_task(client.start(token))
+
+async def stop_bot():
+    if not client.is_closed():
+        await client.close()
+
 # --- Slash Commands ---
 
 @client.tree.command(name="sales", description="View today's revenue and order count")
@@ -92,6 +105,27 @@ async def pending(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed)
 
+@client.tree.command(name="bake", description="Cookies to bake per delivery day")
+@app_commands.describe(days="How many days ahead to plan (default 3)")
+async def bake(interaction: discord.Interaction, days: app_commands.Range[int, 1, 14] = 3):
+    from production import production_plan
+    start = datetime.now().date()
+    db = SessionLocal()
+    try:
+        plan = await asyncio.to_thread(production_plan, db, start, start + timedelta(days=days - 1))
+    finally:
+        db.close()
+
+    embed = discord.Embed(title="👨‍🍳 Production Plan", color=discord.Color.blue())
+    for day in plan["days"]:
+        lines = [f"{c['cookie_name']}: **{c['quantity']}**" for c in day["cookies"]] or ["Nothing scheduled"]
+        header = f"{day['date']} · {day['total_quantity']} cookies"
+        if day["capacity"]:
+            header += f" / {day['capacity']}" + (" ⚠️ OVER CAPACITY" if day["over_capacity"] else "")
+        embed.add_field(name=header, value="\n".join(lines)[:1024], inline=False)
+
+    await interaction.response.send_message(embed=embed)
+
 # --- Interactive Views ---
 
 class OrderView(discord.ui.View):
@@ -140,7 +174,7 @@ class OrderView(discord.ui.View):
 async def send_bot_notification(order_data: dict, order_id: int):
     """Sends a rich embed with buttons to the configured channel"""
     if not client.is_ready() or not client.notification_channel:
-        print("⚠️ Bot not ready or no channel found. Skipping notification.")
+        logger.info("Bot not ready or no channel found. Skipping notification.")
         return
 
     total_price = order_data.get('total_price', 0)
@@ -162,6 +196,6 @@ async def send_bot_notification(order_data: dict, order_id: int):
     view = OrderView(order_id)
     try:
         await client.notification_channel.send(embed=embed, view=view)
-        print("✅ Bot notification sent!")
+        logger.info("Bot notification sent", extra={"order_id": order_id})
     except Exception as e:
-        print(f"❌ Failed to send bot notification: {e}")
+        logger.error("Failed to send bot notification", extra={"error": str(e)})
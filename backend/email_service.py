@@ -1,104 +1,315 @@
 import os
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from pydantic import EmailStr
-from typing import List
+import time
+import asyncio
+import contextvars
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+import aiosmtplib
+from jinja2 import Environment, DictLoader, select_autoescape
 from dotenv import load_dotenv
+from app_logging import get_logger
+from tracing import current_span, span, aiohttp_trace_config, CLIENT
 
 load_dotenv()
 
-# Email configuration
+logger = get_logger("notifications")
+
 # Email configuration
 mail_port = int(os.getenv("SMTP_PORT", 465))
-print(f"📧 Configuring Email: Port {mail_port} (SSL: {mail_port==465})")
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("SMTP_USER", ""),
-    MAIL_PASSWORD=os.getenv("SMTP_PASSWORD", ""),
-    MAIL_FROM=os.getenv("SMTP_USER", ""),
-    MAIL_PORT=mail_port,
-    MAIL_SERVER=os.getenv("SMTP_HOST", "smtp.gmail.com"),
-    MAIL_STARTTLS=(mail_port == 587 or mail_port == 2525),
-    MAIL_SSL_TLS=(mail_port == 465),
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
-
-fastmail = FastMail(conf)
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+MAIL_FROM = os.getenv("MAIL_FROM", SMTP_USER)
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", 15))
+# Providers drop idle sessions; reconnect rather than reuse one older than this
+SMTP_IDLE_SECONDS = int(os.getenv("SMTP_IDLE_SECONDS", 120))
+NOTIFICATION_EMAIL = os.getenv("NOTIFICATION_EMAIL", "thegreatcookiebyalex@gmail.com")
+# off: no order emails, instant: one per order (queued), digest: one summary every EMAIL_DIGEST_MINUTES
+EMAIL_MODE = os.getenv("EMAIL_MODE", "off")
+EMAIL_DIGEST_MINUTES = int(os.getenv("EMAIL_DIGEST_MINUTES", 30))
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", 500))
+EMAIL_MAX_ATTEMPTS = 3
+logger.info("Configuring email", extra={"port": mail_port, "ssl": mail_port == 465, "mode": EMAIL_MODE})
 
-async def send_order_notification(order_data: dict):
-    """Send email notification when a new order is placed"""
-    
-    # Get notification email from env or use default
-    notification_email = os.getenv("NOTIFICATION_EMAIL", "thegreatcookiebyalex@gmail.com")
-    
-    # Create email body
-    html_body = f"""
-    <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                <h2 style="color: #000; border-bottom: 3px solid #000; padding-bottom: 10px;">
-                    🍪 New Order Received!
-                </h2>
-                
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="color: #000; margin-top: 0;">Customer Information</h3>
-                    <p><strong>Name:</strong> {order_data['customer_name']}</p>
-                    <p><strong>Contact:</strong> {order_data['contact']}</p>
-                    <p><strong>Delivery Address:</strong> {order_data.get('delivery_address', 'Not provided')}</p>
-                </div>
-                
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="color: #000; margin-top: 0;">Order Details</h3>
-                    <p><strong>Cookie:</strong> {order_data['cookie_name']}</p>
-                    <p><strong>Quantity:</strong> {order_data['quantity']}</p>
-                    <p><strong>Payment Method:</strong> {order_data.get('payment_method', 'Not specified')}</p>
-                    <p><strong>Preferred Delivery Date:</strong> {order_data.get('delivery_date', 'Not specified')}</p>
-                </div>
-                
-                {f'''<div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3 style="color: #000; margin-top: 0;">Special Requests</h3>
-                    <p>{order_data['notes']}</p>
-                </div>''' if order_data.get('notes') else ''}
-                
-                <div style="background-color: #e8e8e8; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                    <p style="margin: 0;"><strong>Order Source:</strong> {order_data.get('order_source', 'website').upper()}</p>
-                    <p style="margin: 5px 0 0 0; font-size: 12px; color: #666;">
-                        This order was placed via the website order form.
-                    </p>
-                </div>
-                
-                <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center;">
-                    <p style="color: #666; font-size: 12px;">
-                        Log in to your admin panel to manage this order.
-                    </p>
-                </div>
+# Order status markers shared by every Discord message (unknown statuses get ⚪)
+STATUS_EMOJIS = {
+    'pending': '🟡',
+    'confirmed': '✅',
+    'preparing': '👨‍🍳',
+    'out_for_delivery': '🚚',
+    'completed': '✅',
+    'cancelled': '❌'
+}
+
+CARD = 'style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0;"'
+TEMPLATES = {
+    "base.html": """<html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
+            <h2 style="color: #000; border-bottom: 3px solid #000; padding-bottom: 10px;">{% block title %}{% endblock %}</h2>
+            {% block content %}{% endblock %}
+            <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center;">
+                <p style="color: #666; font-size: 12px;">Log in to your admin panel to manage {% block manage %}this order{% endblock %}.</p>
             </div>
-        </body>
-    </html>
-    """
-    
-    # Create message
-    message = MessageSchema(
-        subject=f"🍪 New Order from {order_data['customer_name']}",
-        recipients=[notification_email],
-        body=html_body,
-        subtype="html"
+        </div>
+    </body>
+</html>""",
+    "order.html": """{% extends "base.html" %}
+{% block title %}🍪 New Order Received!{% endblock %}
+{% block content %}
+<div """ + CARD + """>
+    <h3 style="color: #000; margin-top: 0;">Customer Information</h3>
+    <p><strong>Name:</strong> {{ order.customer_name }}</p>
+    <p><strong>Contact:</strong> {{ order.contact }}</p>
+    <p><strong>Delivery Address:</strong> {{ order.delivery_address or 'Not provided' }}</p>
+</div>
+<div """ + CARD + """>
+    <h3 style="color: #000; margin-top: 0;">Order Details</h3>
+    <p><strong>Cookie:</strong> {{ order.cookie_name }}</p>
+    <p><strong>Quantity:</strong> {{ order.quantity }}</p>
+    <p><strong>Payment Method:</strong> {{ order.payment_method or 'Not specified' }}</p>
+    <p><strong>Preferred Delivery Date:</strong> {{ order.delivery_date or 'Not specified' }}</p>
+</div>
+{% if order.notes %}
+<div """ + CARD + """>
+    <h3 style="color: #000; margin-top: 0;">Special Requests</h3>
+    <p>{{ order.notes }}</p>
+</div>
+{% endif %}
+<div style="background-color: #e8e8e8; padding: 15px; border-radius: 8px; margin: 20px 0;">
+    <p style="margin: 0;"><strong>Order Source:</strong> {{ (order.order_source or 'website') | upper }}</p>
+</div>
+{% endblock %}""",
+    "digest.html": """{% extends "base.html" %}
+{% block title %}🍪 {{ orders | length }} New Order{{ 's' if orders | length != 1 }}{% endblock %}
+{% block content %}
+<p>{{ since }} – {{ until }} · {{ total_quantity }} cookies · ₱{{ '{:,.2f}'.format(total_revenue) }}</p>
+<div """ + CARD + """>
+    <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
+        <tr style="text-align: left;"><th>#</th><th>Customer</th><th>Cookie</th><th>Qty</th><th>Delivery</th></tr>
+        {% for order in orders %}
+        <tr style="border-top: 1px solid #eee;">
+            <td>{{ order.id }}</td>
+            <td>{{ order.customer_name }}<br><span style="color: #666;">{{ order.contact }}</span></td>
+            <td>{{ order.cookie_name }}</td>
+            <td>{{ order.quantity }}</td>
+            <td>{{ order.delivery_date or '—' }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+</div>
+{% endblock %}
+{% block manage %}these orders{% endblock %}""",
+}
+
+# Compiled once at import; autoescaping keeps customer-entered text out of the markup
+templates = Environment(loader=DictLoader(TEMPLATES), autoescape=select_autoescape(default=True))
+order_template = templates.get_template("order.html")
+digest_template = templates.get_template("digest.html")
+
+class SmtpSender:
+    """One long-lived SMTP session per worker, reconnected when dropped or idle"""
+
+    def __init__(self):
+        self._client = None
+        self._last_used = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        client = aiosmtplib.SMTP(
+            hostname=SMTP_HOST,
+            port=mail_port,
+            use_tls=mail_port == 465,
+            start_tls=mail_port in (587, 2525),
+            timeout=SMTP_TIMEOUT,
+        )
+        await client.connect()
+        if SMTP_USER:
+            await client.login(SMTP_USER, SMTP_PASSWORD)
+        logger.debug("SMTP connected", extra={"host": SMTP_HOST, "port": mail_port})
+        return client
+
+    async def _close(self):
+        if self._client is not None:
+            try:
+                await self._client.quit()
+            except Exception:
+                self._client.close()
+            self._client = None
+
+    async def send(self, subject: str, html_body: str, recipients: list):
+        message = EmailMessage()
+        message["From"] = MAIL_FROM
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = make_msgid()
+        message.set_content("This message requires an HTML-capable mail client.")
+        message.add_alternative(html_body, subtype="html")
+
+        async with self._lock:
+            if self._client is not None and (
+                not self._client.is_connected or time.monotonic() - self._last_used > SMTP_IDLE_SECONDS
+            ):
+                await self._close()
+            try:
+                if self._client is None:
+                    self._client = await self._connect()
+                await self._client.send_message(message)
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                # Stale session: reconnect once and retry on a fresh one
+                await self._close()
+                self._client = await self._connect()
+                await self._client.send_message(message)
+            except Exception:
+                await self._close()
+                raise
+            self._last_used = time.monotonic()
+
+    async def close(self):
+        async with self._lock:
+            await self._close()
+
+sender = SmtpSender()
+
+def render_order_email(order_data: dict) -> tuple:
+    return f"🍪 New Order from {order_data['customer_name']}", order_template.render(order=order_data)
+
+def render_digest_email(orders: list, since: datetime, until: datetime) -> tuple:
+    subject = f"🍪 {len(orders)} new order{'s' if len(orders) != 1 else ''} since {since:%b %d %H:%M}"
+    html_body = digest_template.render(
+        orders=orders,
+        since=f"{since:%b %d %H:%M}",
+        until=f"{until:%b %d %H:%M}",
+        total_quantity=sum(o.get("quantity") or 0 for o in orders),
+        total_revenue=sum(o.get("total_price") or 0 for o in orders),
     )
-    
+    return subject, html_body
+
+async def send_order_notification(order_data: dict):
+    """Send email notification for one order right away (used by /test-email)"""
+    subject, html_body = render_order_email(order_data)
     try:
-        # Send email
-        await fastmail.send_message(message)
+        await sender.send(subject, html_body, [NOTIFICATION_EMAIL])
         return "SUCCESS"
     except Exception as e:
         error_msg = f"Failed to send email: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(error_msg)
         return error_msg
 
+# --- Background delivery ---
+
+def call_on_loop(fn, *args):
+    """Run fn on the event loop from a sync endpoint's worker thread, in the request's
+    context so the notification still joins its trace"""
+    from anyio import from_thread
+    return from_thread.run_sync(contextvars.copy_context().run, fn, *args)
+
+_queue: asyncio.Queue = None
+_workers = []
+_digest_election = None
+
+def enqueue_order_email(order_data: dict):
+    """Queue an order email without waiting on SMTP (instant mode; a no-op otherwise)"""
+    if EMAIL_MODE != "instant" or _queue is None:
+        return
+    try:
+        # Carry the request's span so the send shows up in its trace
+        _queue.put_nowait((*render_order_email(order_data), current_span.get()))
+    except asyncio.QueueFull:
+        logger.warning("Email queue full, dropping notification", extra={"customer": order_data.get("customer_name")})
+
+async def _deliver(subject: str, html_body: str):
+    for attempt in range(1, EMAIL_MAX_ATTEMPTS + 1):
+        try:
+            await sender.send(subject, html_body, [NOTIFICATION_EMAIL])
+            return True
+        except Exception as e:
+            logger.warning("Email send failed", extra={"attempt": attempt, "error": str(e)})
+            if attempt < EMAIL_MAX_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    logger.error("Giving up on email", extra={"subject": subject})
+    return False
+
+async def _queue_worker():
+    while True:
+        subject, html_body, parent = await _queue.get()
+        token = current_span.set(parent)
+        try:
+            with span("smtp.send", CLIENT, **{"smtp.host": SMTP_HOST}):
+                await _deliver(subject, html_body)
+        finally:
+            current_span.reset(token)
+            _queue.task_done()
+
+async def _digest_loop(session_factory):
+    """Summarize orders created since the last digest; reads the database, so one worker covers all"""
+    from models import Order
+    from main import OrderResponse
+    since = datetime.utcnow()
+    while True:
+        await asyncio.sleep(EMAIL_DIGEST_MINUTES * 60)
+        until = datetime.utcnow()
+
+        def load():
+            db = session_factory()
+            try:
+                rows = db.query(Order).filter(
+                    Order.created_at >= since, Order.created_at < until
+                ).order_by(Order.id).all()
+                return [OrderResponse.model_validate(o).model_dump(mode="json") for o in rows]
+            finally:
+                db.close()
+
+        try:
+            orders = await asyncio.to_thread(load)
+        except Exception as e:
+            logger.warning("Digest query failed", extra={"error": str(e)})
+            continue
+        if orders and not await _deliver(*render_digest_email(orders, since, until)):
+            continue  # Keep the window open and fold these orders into the next digest
+        since = until
+
+async def start_email_delivery(session_factory):
+    """Start the background sender for EMAIL_MODE (digest runs on the elected leader only)"""
+    global _queue, _digest_election
+    if EMAIL_MODE == "instant":
+        _queue = asyncio.Queue(maxsize=EMAIL_QUEUE_SIZE)
+        _workers.append(asyncio.create_task(_queue_worker()))
+    elif EMAIL_MODE == "digest":
+        from leader import LeaderElection
+        _digest_election = LeaderElection("email-digest")
+        digest = {}
+
+        async def on_elected():
+            digest["task"] = asyncio.create_task(_digest_loop(session_factory))
+
+        async def on_demoted():
+            if digest.get("task"):
+                digest.pop("task").cancel()
+
+        _workers.append(asyncio.create_task(_digest_election.run(on_elected, on_demoted)))
+
+async def stop_email_delivery(timeout: float = 5):
+    """Flush queued emails (bounded) and close the SMTP session"""
+    if _queue is not None and not _queue.empty():
+        try:
+            await asyncio.wait_for(_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping unsent emails on shutdown", extra={"pending": _queue.qsize()})
+    for task in _workers:
+        task.cancel()
+    _workers.clear()
+    if _digest_election and _digest_election.is_leader:
+        _digest_election.release()
+    await sender.close()
+
 async def send_discord_notification(order_data: dict):
     """Send order notification to Discord via Webhook"""
     webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
     if not webhook_url:
-        print("⚠️ Discord Webhook URL not found. Skipping.")
+        logger.info("Discord Webhook URL not found. Skipping.")
         return
 
     import aiohttp
@@ -109,15 +320,7 @@ async def send_discord_notification(order_data: dict):
 
     # Format status with emoji
     status = order_data.get('status', 'pending').lower()
-    status_emojis = {
-        'pending': '🟡',
-        'confirmed': '✅',
-        'preparing': '👨‍🍳',
-        'out_for_delivery': '🚚',
-        'completed': '✅',
-        'cancelled': '❌'
-    }
-    status_emoji = status_emojis.get(status, '⚪')
+    status_emoji = STATUS_EMOJIS.get(status, '⚪')
     formatted_status = f"{status_emoji} {status.replace('_', ' ').title()}"
 
     embed = {
@@ -154,23 +357,23 @@ async def send_discord_notification(order_data: dict):
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
             async with session.post(webhook_url, json=payload) as response:
                 if response.status == 204:
-                    print("✅ Discord Notification Sent!")
+                    logger.info("Discord notification sent")
                     return "SUCCESS"
                 else:
-                    print(f"⚠️ Discord Failed: {response.status}")
+                    logger.warning("Discord webhook failed", extra={"status": response.status})
                     return f"Failed: {response.status}"
     except Exception as e:
-        print(f"❌ Discord Error: {str(e)}")
+        logger.error("Discord webhook error", extra={"error": str(e)})
         return str(e)
 
 async def send_discord_status_update(order_data: dict, old_status: str = None):
     """Send Discord notification when order status is updated in admin panel"""
     webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
     if not webhook_url:
-        print("⚠️ Discord Webhook URL not found. Skipping.")
+        logger.info("Discord Webhook URL not found. Skipping.")
         return
 
     import aiohttp
@@ -181,15 +384,7 @@ async def send_discord_status_update(order_data: dict, old_status: str = None):
 
     # Format status with emoji
     status = order_data.get('status', 'pending').lower()
-    status_emojis = {
-        'pending': '🟡',
-        'confirmed': '✅',
-        'preparing': '👨‍🍳',
-        'out_for_delivery': '🚚',
-        'completed': '✅',
-        'cancelled': '❌'
-    }
-    status_emoji = status_emojis.get(status, '⚪')
+    status_emoji = STATUS_EMOJIS.get(status, '⚪')
     formatted_status = f"{status_emoji} {status.replace('_', ' ').title()}"
     
     # Different color for status updates
@@ -224,7 +419,7 @@ async def send_discord_status_update(order_data: dict, old_status: str = None):
     # Show status change if old status provided
     status_message = "📢 **Order Status Changed!**"
     if old_status and old_status != status:
-        old_emoji = status_emojis.get(old_status.lower(), '⚪')
+        old_emoji = STATUS_EMOJIS.get(old_status.lower(), '⚪')
         status_message = f"📢 Status: {old_emoji} {old_status.title()} → {status_emoji} {status.title()}"
 
     payload = {
@@ -233,15 +428,53 @@ async def send_discord_status_update(order_data: dict, old_status: str = None):
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
             async with session.post(webhook_url, json=payload) as response:
                 if response.status == 204:
-                    print("✅ Discord Status Update Sent!")
+                    logger.info("Discord status update sent", extra={"order_id": order_data.get('id')})
                     return "SUCCESS"
                 else:
-                    print(f"⚠️ Discord Failed: {response.status}")
+                    logger.warning("Discord webhook failed", extra={"status": response.status})
                     return f"Failed: {response.status}"
     except Exception as e:
-        print(f"❌ Discord Error: {str(e)}")
+        logger.error("Discord webhook error", extra={"error": str(e)})
         return str(e)
 
+async def send_discord_bulk_status_update(orders: list, status: str):
+    """One webhook post summarizing a bulk status change"""
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+    if not webhook_url or not orders:
+        return
+
+    import aiohttp
+
+    shown = orders[:20]
+    lines = [f"#{o['id']} · {o['customer_name']} · {o['cookie_name']} ×{o['quantity']}" for o in shown]
+    if len(orders) > len(shown):
+        lines.append(f"…and {len(orders) - len(shown)} more")
+    total = sum(o.get('total_price') or 0 for o in orders)
+
+    embed = {
+        "title": f"📝 {len(orders)} Orders Updated",
+        "description": "\n".join(lines),
+        "color": 3447003,
+        "fields": [
+            {"name": "Status", "value": f"{STATUS_EMOJIS.get(status, '⚪')} {status.replace('_', ' ').title()}", "inline": True},
+            {"name": "Total Value", "value": f"₱{total:,.2f}", "inline": True},
+        ],
+        "footer": {"text": "Updated by Admin"}
+    }
+    payload = {"content": "📢 **Bulk Status Change**", "embeds": [embed]}
+
+    try:
+        async with aiohttp.ClientSession(trace_configs=[aiohttp_trace_config()]) as session:
+            async with session.post(webhook_url, json=payload) as response:
+                if response.status == 204:
+                    logger.info("Discord bulk update sent", extra={"orders": len(orders), "status": status})
+                    return "SUCCESS"
+                else:
+                    logger.warning("Discord webhook failed", extra={"status": response.status})
+                    return f"Failed: {response.status}"
+    except Exception as e:
+        logger.error("Discord webhook error", extra={"error": str(e)})
+        return str(e)
@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from models import IdempotencyRecord
+
+# Idempotency-Key replays are honoured for a day; identical bodies without a key
+# are only collapsed within a short window (double taps, client retries).
+# Keys live in the database and are inserted in the same transaction as the order,
+# so a retry that lands on another worker still finds (or waits for) the original.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 86400))
+DUPLICATE_WINDOW_SECONDS = int(os.getenv("DUPLICATE_ORDER_WINDOW", 10))
+MAX_KEY_LENGTH = 255
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different body"""
+
+def order_key(idempotency_key: Optional[str], fingerprint: str):
+    """(stored key, TTL) for an order request: its explicit key, else its body"""
+    if idempotency_key:
+        return f"key:{idempotency_key}", IDEMPOTENCY_KEY_TTL
+    return f"body:{fingerprint}", DUPLICATE_WINDOW_SECONDS
+
+def find_replay(db: Session, key: str, fingerprint: str) -> Optional[dict]:
+    """The stored response for an unexpired key, or None if this request should run"""
+    record = db.get(IdempotencyRecord, key)
+    if record is None or record.expires_at <= datetime.utcnow():
+        return None
+    if record.fingerprint != fingerprint:
+        raise IdempotencyConflict(key)
+    return json.loads(record.response)
+
+def record_response(db: Session, key: str, fingerprint: str, ttl: int, order_id: int, response: dict):
+    """Store the response in the caller's transaction; a concurrent duplicate fails its commit
+    on the primary key (IntegrityError) and replays this one instead"""
+    now = datetime.utcnow()
+    # An expired record would otherwise block reusing its key
+    db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key, IdempotencyRecord.expires_at <= now))
+    db.add(IdempotencyRecord(
+        key=key, fingerprint=fingerprint, order_id=order_id,
+        response=json.dumps(response, default=str), expires_at=now + timedelta(seconds=ttl)
+    ))
+
+def purge_expired(db: Session) -> int:
+    deleted = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= datetime.utcnow())).rowcount
+    db.commit()
+    return deleted
+
+def request_fingerprint(payload: dict) -> str:
+    """Stable hash of a request body, ignoring case and surrounding whitespace"""
+    normalized = {
+        key: value.strip().lower() if isinstance(value, str) else value
+        for key, value in payload.items()
+    }
+    encoded = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import update, delete, func, event
+from sqlalchemy.orm import Session
+
+from models import CookieStock, StockReservation
+from app_logging import get_logger
+from cache_bus import bus as cache_bus
+
+# Daily stock for flash sales. Cookies without a stock row for today are unlimited.
+# Remaining counts are cached per worker so sold-out flavours are rejected (and the
+# menu shows stock) without a query; each reservation is still a single conditional
+# UPDATE, so the database is the final word and stock can never go negative.
+STOCK_CACHE_TTL = int(os.getenv("STOCK_CACHE_TTL", 30))
+
+logger = get_logger("inventory")
+
+class SoldOut(Exception):
+    def __init__(self, cookie_name: str, remaining: int):
+        super().__init__(cookie_name)
+        self.cookie_name = cookie_name
+        self.remaining = remaining
+
+_levels = {"date": None, "loaded_at": 0.0, "remaining": {}}
+_levels_lock = threading.Lock()
+
+def stock_day() -> date:
+    return date.today()
+
+def get_stock_levels(db: Session) -> dict:
+    """Remaining stock per cookie for today, refreshed at most every STOCK_CACHE_TTL seconds"""
+    today = stock_day()
+    with _levels_lock:
+        if _levels["date"] == today and time.time() - _levels["loaded_at"] < STOCK_CACHE_TTL:
+            return _levels["remaining"]
+    rows = db.query(CookieStock.cookie_name, CookieStock.quantity - CookieStock.reserved).filter(
+        CookieStock.stock_date == today
+    ).all()
+    remaining = {name: left for name, left in rows}
+    with _levels_lock:
+        _levels.update(date=today, loaded_at=time.time(), remaining=remaining)
+    return remaining
+
+def invalidate_stock_levels():
+    with _levels_lock:
+        _levels["loaded_at"] = 0.0
+
+def _on_cache_invalidation(namespace: str):
+    if "stock".startswith(namespace):
+        invalidate_stock_levels()
+
+cache_bus.subscribe(_on_cache_invalidation)
+
+def _set_cached_remaining(cookie_name: str, remaining: int):
+    with _levels_lock:
+        if _levels["date"] == stock_day():
+            _levels["remaining"] = {**_levels["remaining"], cookie_name: remaining}
+
+def order_stock_day(created_at: datetime) -> date:
+    """Stock day an order was placed on (created_at is naive UTC, stock days are local)"""
+    return created_at.replace(tzinfo=timezone.utc).astimezone().date()
+
+def reserve_stock(db: Session, cookie_name: str, quantity: int, day: Optional[date] = None) -> Optional[int]:
+    """Claim stock inside the caller's transaction.
+
+    Returns the stock row id (to be recorded with record_reservation), None when
+    the cookie has no stock limit that day, or raises SoldOut. The cached levels
+    only short-circuit known sell-outs; the conditional UPDATE decides everything
+    else, so a limit set moments ago on another worker is still honoured.
+    """
+    if quantity <= 0:
+        raise ValueError(f"Cannot reserve a quantity of {quantity}")
+    day = day or stock_day()
+    if day == stock_day():
+        levels = get_stock_levels(db)
+        if cookie_name in levels and levels[cookie_name] < quantity:
+            raise SoldOut(cookie_name, levels[cookie_name])
+
+    row = db.execute(
+        update(CookieStock)
+        .where(
+            CookieStock.cookie_name == cookie_name,
+            CookieStock.stock_date == day,
+            CookieStock.reserved + quantity <= CookieStock.quantity,
+        )
+        .values(reserved=CookieStock.reserved + quantity)
+        .returning(CookieStock.id, CookieStock.quantity - CookieStock.reserved)
+    ).first()
+    if row is None:
+        remaining = db.query(CookieStock.quantity - CookieStock.reserved).filter(
+            CookieStock.cookie_name == cookie_name, CookieStock.stock_date == day
+        ).scalar()
+        if remaining is None:
+            # No stock row that day: unlimited
+            return None
+        # Lost the race (or stale cache): not enough left for this request
+        db.rollback()
+        invalidate_stock_levels()
+        raise SoldOut(cookie_name, remaining)
+
+    stock_id, remaining = row
+    if day == stock_day():
+        _set_cached_remaining(cookie_name, remaining)
+    return stock_id
+
+def record_reservation(db: Session, order_id: int, stock_id: int, quantity: int):
+    db.add(StockReservation(order_id=order_id, stock_id=stock_id, quantity=quantity))
+
+def release_stock(db: Session, order_id: int):
+    """Return an order's reserved stock (cancellation/deletion); caller commits"""
+    reservation = db.query(StockReservation).filter(StockReservation.order_id == order_id).first()
+    if not reservation:
+        return
+    db.execute(
+        update(CookieStock)
+        .where(CookieStock.id == reservation.stock_id)
+        .values(reserved=CookieStock.reserved - reservation.quantity)
+    )
+    db.delete(reservation)
+    # Tell the other workers only once the release is actually committed
+    event.listen(db, "after_commit", lambda session: cache_bus.publish("stock"), once=True)
+    logger.info("Released stock", extra={"order_id": order_id, "quantity": reservation.quantity})
+
+def adjust_reservation(db: Session, order_id: int, cookie_name: str, quantity: int):
+    """Move an order's reservation to its edited cookie/quantity; caller commits.
+
+    Orders placed without a stock limit have no reservation and stay unlimited.
+    The order keeps its original stock day. Raises SoldOut if the new amount doesn't fit.
+    """
+    if quantity <= 0:
+        raise ValueError(f"Cannot reserve a quantity of {quantity}")
+    reservation = db.query(StockReservation).filter(StockReservation.order_id == order_id).first()
+    if not reservation:
+        return
+    old = db.get(CookieStock, reservation.stock_id)
+    if old.cookie_name == cookie_name:
+        target_id = old.id
+    else:
+        target_id = db.query(CookieStock.id).filter(
+            CookieStock.cookie_name == cookie_name, CookieStock.stock_date == old.stock_date
+        ).scalar()
+    # Hand the old claim back first, so resizing on the same row only needs the difference
+    db.execute(
+        update(CookieStock)
+        .where(CookieStock.id == old.id)
+        .values(reserved=CookieStock.reserved - reservation.quantity)
+    )
+    if target_id is None:
+        # New cookie has no limit that day
+        db.delete(reservation)
+    else:
+        claimed = db.execute(
+            update(CookieStock)
+            .where(CookieStock.id == target_id, CookieStock.reserved + quantity <= CookieStock.quantity)
+            .values(reserved=CookieStock.reserved + quantity)
+            .returning(CookieStock.id)
+        ).first()
+        if claimed is None:
+            remaining = db.query(CookieStock.quantity - CookieStock.reserved).filter(CookieStock.id == target_id).scalar()
+            db.rollback()
+            raise SoldOut(cookie_name, remaining)
+        reservation.stock_id = target_id
+        reservation.quantity = quantity
+    event.listen(db, "after_commit", lambda session: cache_bus.publish("stock"), once=True)
+    logger.info("Adjusted stock reservation", extra={"order_id": order_id, "cookie_name": cookie_name, "quantity": quantity})
+
+def release_stock_bulk(db: Session, order_ids: list):
+    """release_stock for many orders: one UPDATE per stock row touched; caller commits"""
+    if not order_ids:
+        return
+    totals = db.query(StockReservation.stock_id, func.sum(StockReservation.quantity)).filter(
+        StockReservation.order_id.in_(order_ids)
+    ).group_by(StockReservation.stock_id).all()
+    if not totals:
+        return
+    for stock_id, quantity in totals:
+        db.execute(
+            update(CookieStock)
+            .where(CookieStock.id == stock_id)
+            .values(reserved=CookieStock.reserved - quantity)
+        )
+    db.execute(delete(StockReservation).where(StockReservation.order_id.in_(order_ids)))
+    event.listen(db, "after_commit", lambda session: cache_bus.publish("stock"), once=True)
+    logger.info("Released stock", extra={"orders": len(order_ids), "quantity": sum(q for _, q in totals)})
+
+def set_stock(db: Session, cookie_name: str, quantity: int, day: Optional[date] = None) -> CookieStock:
+    """Create or resize a day's stock; reservations already made are kept"""
+    day = day or stock_day()
+    stock = db.query(CookieStock).filter(
+        CookieStock.cookie_name == cookie_name, CookieStock.stock_date == day
+    ).first()
+    if stock is None:
+        stock = CookieStock(cookie_name=cookie_name, stock_date=day, quantity=quantity, reserved=0)
+        db.add(stock)
+    else:
+        stock.quantity = max(quantity, stock.reserved)
+    db.commit()
+    db.refresh(stock)
+    cache_bus.publish("stock")
+    return stock
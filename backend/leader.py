@@ -0,0 +1,116 @@
+import asyncio
+import os
+import zlib
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from database import engine
+from app_logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locks, single worker assumed
+    fcntl = None
+
+# Single-leader election across worker processes. On Postgres the leader holds a
+# session-level advisory lock on a dedicated connection; anywhere else it holds an
+# exclusive flock on a shared file. Both are released by the OS/server when the
+# leader process dies, and followers retrying every LEADER_RETRY_SECONDS take over.
+LEADER_RETRY_SECONDS = int(os.getenv("LEADER_RETRY_SECONDS", 15))
+LEADER_LOCK_DIR = os.getenv("LEADER_LOCK_DIR", "/tmp")
+
+logger = get_logger("leader")
+
+class _AdvisoryLock:
+    def __init__(self, name: str):
+        self.key = zlib.crc32(f"greatcookie:{name}".encode())
+        # Outside the request pool so holding it never costs a request a connection
+        self._engine = create_engine(engine.url, poolclass=NullPool)
+        self._conn = None
+
+    def try_acquire(self) -> bool:
+        conn = self._engine.connect()
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def still_held(self) -> bool:
+        try:
+            self._conn.execute(text("SELECT 1"))
+            self._conn.commit()
+            return True
+        except Exception:
+            self.release()
+            return False
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()  # Closing the session drops the advisory lock
+            except Exception:
+                pass
+            self._conn = None
+
+class _FileLock:
+    def __init__(self, name: str):
+        self.path = os.path.join(LEADER_LOCK_DIR, f"greatcookie-{name}.lock")
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def still_held(self) -> bool:
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class LeaderElection:
+    """Runs `on_elected` in exactly one process and `on_demoted` if leadership is lost"""
+
+    def __init__(self, name: str):
+        self.name = name
+        if engine.dialect.name == "postgresql":
+            self._lock = _AdvisoryLock(name)
+        else:
+            self._lock = _FileLock(name)
+        self.is_leader = False
+
+    async def run(self, on_elected, on_demoted):
+        while True:
+            try:
+                if not self.is_leader:
+                    if await asyncio.to_thread(self._lock.try_acquire):
+                        self.is_leader = True
+                        logger.info("Acquired leadership", extra={"role": self.name, "pid": os.getpid()})
+                        await on_elected()
+                elif not await asyncio.to_thread(self._lock.still_held):
+                    self.is_leader = False
+                    logger.warning("Lost leadership", extra={"role": self.name, "pid": os.getpid()})
+                    await on_demoted()
+            except Exception as e:
+                logger.warning("Leader election error", extra={"role": self.name, "error": str(e)})
+            await asyncio.sleep(LEADER_RETRY_SECONDS)
+
+    def release(self):
+        self._lock.release()
+        self.is_leader = False
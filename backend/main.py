@@ -1,23 +1,48 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 import os
 from dotenv import load_dotenv
-from functools import lru_cache
+from functools import lru_cache, partial
 import time
+import json
+import hashlib
+import zlib
 
-from database import engine, get_db, Base
-from models import Cookie, Order, Review
+from database import (
+    engine, get_db, get_read_db, Base, SessionLocal, POOL_SIZE, track_request_writes, ReplicaSessionLocal,
+    STICKY_COOKIE, STICKY_HEADER, REPLICA_STICKY_SECONDS
+)
+from models import Cookie, Order, Review, RatingSummary
+from migrations import run_migrations
+from review_stats import ALL_REVIEWS, ensure_rating_summaries, summary_to_dict
 from admin_routes import router as admin_router
+from query_stats import (
+    start_request_stats, server_timing_header, check_query_budget, query_budget
+)
+from app_logging import get_logger, request_id_var, new_request_id
+from admission import admission, classify_request
+from tracing import start_trace, current_span, span as trace_span, exporter as span_exporter
+from cache_bus import bus as cache_bus
+from columnar import snapshot_refresh_loop
+from inventory import get_stock_levels, invalidate_stock_levels, reserve_stock, record_reservation, SoldOut
+from idempotency import (
+    order_key, find_replay, record_response, purge_expired, request_fingerprint, IdempotencyConflict, MAX_KEY_LENGTH
+)
 
 load_dotenv()
 
+logger = get_logger("api")
+
 # Create tables
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(title="The Great Cookie API")
 
@@ -33,33 +58,251 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[STICKY_HEADER],  # Read by the SPA for read-your-writes
 )
 
 # Add GZip compression for responses larger than 1KB
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Per-request SQL stats exposed via Server-Timing
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    stats = start_request_stats()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = server_timing_header(stats)
+    logger.debug(
+        "Request finished",
+        extra={"method": request.method, "path": request.url.path, "status": response.status_code,
+               "queries": stats.count, "db_ms": round(stats.total_ms, 2)},
+    )
+    check_query_budget(request.scope.get("endpoint"), stats, request.url.path)
+    return response
+
+# Read-your-writes: a client that just committed reads from the primary for a few seconds
+@app.middleware("http")
+async def replica_stickiness_middleware(request: Request, call_next):
+    if ReplicaSessionLocal is None:
+        return await call_next(request)
+    writes = track_request_writes()
+    response = await call_next(request)
+    if writes["wrote"]:
+        primary_until = f"{time.time() + REPLICA_STICKY_SECONDS:.3f}"
+        # Header for cross-origin clients (echoed back by apiFetch), cookie for same-origin ones
+        response.headers[STICKY_HEADER] = primary_until
+        response.set_cookie(
+            STICKY_COOKIE, primary_until,
+            max_age=REPLICA_STICKY_SECONDS, httponly=True, samesite="lax"
+        )
+    return response
+
+# Admission control: bounded, prioritised waiting in front of the DB pool
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    request_class = classify_request(request.method, request.url.path)
+    if request_class is None:
+        return await call_next(request)
+    with trace_span("admission.wait", **{"admission.class": request_class}):
+        admitted = await admission.acquire(request_class)
+    if not admitted:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please try again shortly"},
+            headers={"Retry-After": "2"}
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.release()
+
+# Head-sampled tracing; the root span covers admission, handler, SQL and webhook child spans
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    root = start_trace(
+        f"{request.method} {request.url.path}", request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path, "request_id": request_id_var.get()}
+    )
+    if root is None:
+        return await call_next(request)
+    token = current_span.set(root)
+    try:
+        response = await call_next(request)
+    except BaseException as e:
+        root.end(e)
+        raise
+    finally:
+        current_span.reset(token)
+    route = request.scope.get("route")
+    root.set(**{"http.status_code": response.status_code, "http.route": getattr(route, "path", None) or request.url.path})
+    root.end()
+    response.headers["X-Trace-Id"] = root.trace_id
+    return response
+
+# Request IDs for log correlation (honours an upstream X-Request-ID)
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    request_id_var.set(request_id)
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Include admin routes
 app.include_router(admin_router)
 
 # Simple in-memory cache with timestamps
 cache_store = {}
-CACHE_TTL = {"cookies": 300, "reviews": 60}  # 5 min for cookies, 1 min for reviews
+if cache_bus.cross_process:
+    # Writes evict every worker immediately, so TTLs are only a safety net
+    CACHE_TTL = {"cookies": 3600, "reviews": 600}
+else:
+    CACHE_TTL = {"cookies": 300, "reviews": 60}  # 5 min for cookies, 1 min for reviews
+# Ranges that include today keep changing; closed ranges only change through admin edits
+CACHE_TTL.update({"analytics": 60, "analytics_closed": 3600})
+
+# Refresh-ahead: keys read within their TTL are recomputed in the background shortly
+# before they expire (or right after an invalidation), so visitors rarely miss
+REFRESH_AHEAD_RATIO = 0.8
+REFRESH_AHEAD_INTERVAL = int(os.getenv("REFRESH_AHEAD_INTERVAL", 5))
+cache_loaders = {}      # key -> zero-arg callable recomputing the value with its own session
+cache_last_access = {}  # key -> last time a request asked for it
+cache_generation = 0    # Bumped on every eviction so in-flight refreshes can't resurrect stale data
+cache_stale = set()     # Keys still served but due for a background reload
+STALE_PREFIX = "~"      # Bus messages "~<prefix>" mean "reload in the background", not "evict"
+
+def _cache_ttl(key: str) -> int:
+    return CACHE_TTL.get(key.split(":")[0], 60)
 
 def get_cache(key: str):
-    if key in cache_store:
-        data, timestamp = cache_store[key]
-        ttl = CACHE_TTL.get(key.split(":")[0], 60)
-        if time.time() - timestamp < ttl:
+    now = time.time()
+    cache_last_access[key] = now
+    entry = cache_store.get(key)  # The invalidation listener may evict concurrently
+    if entry is not None:
+        data, timestamp, _ = entry
+        if now - timestamp < _cache_ttl(key):
             return data
     return None
 
-def set_cache(key: str, data):
-    cache_store[key] = (data, time.time())
+def set_cache(key: str, data, loader=None):
+    # The content digest is the entry's version: identical in every worker holding the
+    # same data, and it changes as soon as an invalidated key is reloaded with new content
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    cache_store[key] = (data, time.time(), digest)
+    if loader is not None:
+        cache_loaders[key] = loader
+
+def cache_version(key: str) -> Optional[str]:
+    entry = cache_store.get(key)
+    return entry[2] if entry is not None else None
+
+# HTTP caching for public endpoints: browsers/CDNs revalidate with If-None-Match
+HTTP_CACHE_POLICY = {
+    # Carries live flash-sale stock: caches may keep a copy but must revalidate (cheap 304s via the ETag)
+    "cookies": "public, no-cache",
+    "reviews": "public, max-age=30, stale-while-revalidate=300",
+    "dashboard": "private, no-cache",  # Admin data: always revalidate, never shared caches
+}
+
+def apply_http_caching(request: Request, response: Response, namespace: str, version: Optional[str]):
+    """Set Cache-Control/ETag; returns a 304 response when the client's copy is current"""
+    response.headers["Cache-Control"] = HTTP_CACHE_POLICY[namespace]
+    if version is None:
+        return None
+    etag = f'W/"{version}"'
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": HTTP_CACHE_POLICY[namespace]})
+    return None
 
-def invalidate_cache(prefix: str):
-    keys_to_delete = [k for k in cache_store.keys() if k.startswith(prefix)]
+def _evict_local(prefix: str):
+    global cache_generation
+    cache_generation += 1
+    keys_to_delete = [k for k in list(cache_store.keys()) if k.startswith(prefix)]
     for k in keys_to_delete:
-        del cache_store[k]
+        cache_store.pop(k, None)
+
+def invalidate_cache(prefix: str):
+    """Evict a namespace in this worker and every other worker"""
+    cache_bus.publish(prefix)
+
+def _mark_stale(prefix: str):
+    cache_stale.update(k for k in list(cache_store.keys()) if k.startswith(prefix) and k in cache_loaders)
+
+def refresh_cache(prefix: str):
+    """Reload a namespace in the background everywhere, serving the current copy meanwhile"""
+    _mark_stale(prefix)
+    cache_bus.publish(STALE_PREFIX + prefix, local=False)
+
+def patch_cache(prefix: str, patch):
+    """Edit cached values in place with patch(key, data) -> new data (None drops the key).
+
+    Other workers can't see the edit, so they reload the namespace in the background.
+    """
+    global cache_generation
+    cache_generation += 1  # An in-flight refresh may have read pre-patch rows
+    for key in [k for k in list(cache_store.keys()) if k.startswith(prefix)]:
+        entry = cache_store.get(key)
+        if entry is None:
+            continue
+        data = patch(key, entry[0])
+        if data is None:
+            cache_store.pop(key, None)
+        else:
+            set_cache(key, data)
+    cache_bus.publish(STALE_PREFIX + prefix, local=False)
+
+def _on_cache_message(namespace: str):
+    if namespace.startswith(STALE_PREFIX):
+        _mark_stale(namespace[len(STALE_PREFIX):])
+    else:
+        _evict_local(namespace)
+
+cache_bus.subscribe(_on_cache_message)
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+async def refresh_ahead_loop():
+    import asyncio
+    while True:
+        await asyncio.sleep(REFRESH_AHEAD_INTERVAL)
+        now = time.time()
+        for key, loader in list(cache_loaders.items()):
+            ttl = _cache_ttl(key)
+            if now - cache_last_access.get(key, 0) > ttl:
+                # Cold key: let it expire and stop tracking it
+                cache_loaders.pop(key, None)
+                cache_last_access.pop(key, None)
+                continue
+            entry = cache_store.get(key)
+            if entry is not None and now - entry[1] < ttl * REFRESH_AHEAD_RATIO and key not in cache_stale:
+                continue
+            cache_stale.discard(key)
+            generation = cache_generation
+            try:
+                data = await asyncio.to_thread(loader)
+            except Exception as e:
+                logger.warning("Cache refresh failed", extra={"key": key, "error": str(e)})
+                continue
+            if generation == cache_generation:
+                set_cache(key, data)
+
+def warm_up():
+    """Open the pool's connections and fill the default menu/review keys before serving"""
+    connections = [engine.connect() for _ in range(POOL_SIZE)]
+    for conn in connections:
+        conn.close()  # Back into the pool, already authenticated
+    now = time.time()
+    for key, loader in (
+        (_cookies_cache_key(None, 100), partial(_with_session, _cookie_rows, None, 100)),
+        (_reviews_cache_key(50), partial(_with_session, _review_rows, 50)),
+    ):
+        set_cache(key, loader(), loader)
+        cache_last_access[key] = now
 
 # Pydantic schemas
 class CookieCreate(BaseModel):
@@ -78,6 +321,9 @@ class CookieResponse(BaseModel):
     category: str
     price: float
     image: str
+    stock_remaining: Optional[int] = None  # Only set for cookies with a daily stock limit
+    average_rating: Optional[float] = None
+    review_count: int = 0
 
     class Config:
         from_attributes = True
@@ -86,14 +332,20 @@ class OrderCreate(BaseModel):
     customer_name: str
     contact: str
     cookie_name: str
-    quantity: int
+    quantity: int = Field(gt=0)
     notes: Optional[str] = None
     delivery_address: Optional[str] = None
     total_price: Optional[float] = None
     payment_method: Optional[str] = None
-    delivery_date: Optional[str] = None
+    delivery_date: Optional[date] = None
     order_source: Optional[str] = "website"
 
+    @field_validator("delivery_date", mode="before")
+    @classmethod
+    def blank_date_is_none(cls, value):
+        # The order form sends "" when no date was picked
+        return None if value == "" else value
+
 class OrderResponse(BaseModel):
     id: int
     customer_name: str
@@ -104,7 +356,7 @@ class OrderResponse(BaseModel):
     delivery_address: Optional[str]
     total_price: Optional[float]
     payment_method: Optional[str]
-    delivery_date: Optional[str]
+    delivery_date: Optional[date]
     order_source: str
     status: str
     created_at: datetime
@@ -115,14 +367,16 @@ class OrderResponse(BaseModel):
 
 class ReviewCreate(BaseModel):
     customer_name: str
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: str
+    cookie_name: Optional[str] = None
 
 class ReviewResponse(BaseModel):
     id: int
     customer_name: str
     rating: int
     comment: str
+    cookie_name: Optional[str] = None
     approved: bool
     created_at: datetime
 
@@ -139,28 +393,74 @@ def health_check():
     """Health check endpoint for uptime monitoring (prevents Render cold starts)"""
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus-style gauges/counters for admission control and the DB pool"""
+    stats = admission.metrics()
+    lines = [
+        f"admission_limit {stats['limit']}",
+        f"admission_in_flight {stats['in_flight']}",
+        f"admission_queue_depth {stats['queue_depth']}",
+    ]
+    for request_class, count in stats["admitted"].items():
+        lines.append(f'admission_admitted_total{{class="{request_class}"}} {count}')
+    for request_class, count in stats["rejected"].items():
+        lines.append(f'admission_rejected_total{{class="{request_class}"}} {count}')
+    lines.append(f"db_pool_checked_out {engine.pool.checkedout()}")
+    return "\n".join(lines) + "\n"
+
 @app.get("/api/cookies", response_model=List[CookieResponse])
-def get_cookies(search: Optional[str] = None, limit: int = 100, db: Session = Depends(get_db)):
+@query_budget(2)
+def get_cookies(
+    request: Request,
+    response: Response,
+    search: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
     # Create cache key based on search params
-    cache_key = f"cookies:search={search or ''}:limit={limit}"
+    cache_key = _cookies_cache_key(search, limit)
     
     # Check cache first
     cached_data = get_cache(cache_key)
-    if cached_data is not None:
-        return cached_data
+    if cached_data is None:
+        # Fetch from database
+        cached_data = _cookie_rows(db, search, limit)
+        # Store in cache
+        set_cache(cache_key, cached_data, partial(_with_session, _cookie_rows, search, limit))
     
-    # Fetch from database
-    query = db.query(Cookie)
+    # Overlay today's stock from the in-memory levels (no query while they are fresh)
+    levels = get_stock_levels(db)
+    version = cache_version(cache_key)
+    if version and levels:
+        version = f"{version}-{zlib.crc32(repr(sorted(levels.items())).encode()):08x}"
+    not_modified = apply_http_caching(request, response, "cookies", version)
+    if not_modified is not None:
+        return not_modified
+    if not levels:
+        return cached_data
+    return [{**c, "stock_remaining": levels.get(c["name"])} for c in cached_data]
+
+def _cookies_cache_key(search: Optional[str], limit: int) -> str:
+    return f"cookies:search={search or ''}:limit={limit}"
+
+def _cookie_rows(db: Session, search: Optional[str], limit: int) -> list:
+    # Ratings come from the precomputed summaries in the same query
+    query = db.query(Cookie, RatingSummary).outerjoin(RatingSummary, RatingSummary.scope == Cookie.name)
     if search:
         query = query.filter(
             (Cookie.name.ilike(f"%{search}%")) |
             (Cookie.description.ilike(f"%{search}%"))
         )
-    results = query.limit(limit).all()
-    
-    # Store in cache
-    set_cache(cache_key, results)
-    return results
+    rows = []
+    # Explicit order: the join would otherwise let PostgreSQL return the menu shuffled
+    for cookie, summary in query.order_by(Cookie.id).limit(limit).all():
+        row = CookieResponse.model_validate(cookie).model_dump()
+        if summary and summary.review_count:
+            row["average_rating"] = round(summary.rating_total / summary.review_count, 2)
+            row["review_count"] = summary.review_count
+        rows.append(row)
+    return rows
 
 @app.post("/api/cookies", response_model=CookieResponse)
 def create_cookie(cookie: CookieCreate, db: Session = Depends(get_db)):
@@ -169,32 +469,109 @@ def create_cookie(cookie: CookieCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(db_cookie)
     
-    # Invalidate cookie cache
+    # Invalidate cookie cache and republish the static menu
+    from menu_publisher import publish_menu
     invalidate_cache("cookies")
+    publish_menu(db)
     return db_cookie
 
 # Startup Event to Launch Bot
+# Only the worker holding the leader lock runs the bot; the others stay plain HTTP servers
+bot_election = None
+archive_election = None
+archive_task = None
+
+async def _start_archiver():
+    import asyncio
+    global archive_task
+    from archive import archive_loop
+    archive_task = asyncio.create_task(archive_loop(SessionLocal))
+
+async def _stop_archiver():
+    global archive_task
+    if archive_task:
+        archive_task.cancel()
+        archive_task = None
+
 @app.on_event("startup")
 async def startup_event():
     import asyncio
-    from discord_bot import client
+    from discord_bot import start_bot, stop_bot
+    from leader import LeaderElection
+    from archive import ARCHIVE_AFTER_DAYS
+    global bot_election, archive_election
+    cache_bus.start()
+    try:
+        await asyncio.to_thread(_with_session, ensure_rating_summaries)
+        await asyncio.to_thread(_with_session, purge_expired)
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        logger.warning("Cache warm-up failed", extra={"error": str(e)})
+    # A fresh deploy (or a catalog edited outside the API) gets a current static menu
+    from menu_publisher import publish_menu
+    asyncio.create_task(asyncio.to_thread(_with_session, publish_menu))
+    asyncio.create_task(refresh_ahead_loop())
+    asyncio.create_task(snapshot_refresh_loop(SessionLocal))
+    from email_service import start_email_delivery
+    await start_email_delivery(SessionLocal)
+    if ARCHIVE_AFTER_DAYS > 0:
+        archive_election = LeaderElection("order-archiver")
+        asyncio.create_task(archive_election.run(on_elected=_start_archiver, on_demoted=_stop_archiver))
     token = os.getenv("DISCORD_BOT_TOKEN")
     if token and token != "your_discord_bot_token_here":
         try:
-            # We wrap this in a task, but if it fails immediately 'await' might raise.
-            # However, start() is async.
-            asyncio.create_task(client.start(token))
+            bot_election = LeaderElection("discord-bot")
+            asyncio.create_task(bot_election.run(
+                on_elected=lambda: start_bot(token),
+                on_demoted=stop_bot
+            ))
         except Exception as e:
-             print(f"⚠️ Discord Bot failed to start: {e}")
+             logger.warning("Discord Bot failed to start", extra={"error": str(e)})
     else:
-        print("⚠️ No valid DISCORD_BOT_TOKEN found. Bot will not start.")
+        logger.warning("No valid DISCORD_BOT_TOKEN found. Bot will not start.")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from email_service import stop_email_delivery
+    cache_bus.stop()
+    await stop_email_delivery()
+    span_exporter.drain()
+    if bot_election and bot_election.is_leader:
+        from discord_bot import stop_bot
+        await stop_bot()
+        bot_election.release()
+    if archive_election and archive_election.is_leader:
+        await _stop_archiver()
+        archive_election.release()
 
 @app.post("/api/orders", response_model=OrderResponse)
-async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
+def create_order(
+    order: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     from email_service import send_order_notification
     from discord_bot import send_bot_notification
     import asyncio
     
+    # Collapse retries and double taps: explicit key first, else identical body within a short window
+    if idempotency_key and len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    fingerprint = request_fingerprint(order.dict())
+    key, key_ttl = order_key(idempotency_key, fingerprint)
+
+    def replay(stored: dict):
+        response.headers["Idempotent-Replayed"] = "true"
+        return stored
+
+    try:
+        stored = find_replay(db, key, fingerprint)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different order")
+    if stored is not None:
+        return replay(stored)
+
     # Calculate total price if missing (Fix for 0 Revenue)
     if not order.total_price:
         # Find the cookie to get its price
@@ -205,30 +582,60 @@ async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
             # Fallback if cookie name doesn't match
             order.total_price = 0.0
 
-    # Create order in database
+    # Claim flash-sale stock in the same transaction as the insert
+    try:
+        stock_id = reserve_stock(db, order.cookie_name, order.quantity)
+    except SoldOut as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{e.cookie_name} is sold out for today" if e.remaining <= 0
+            else f"Only {e.remaining} {e.cookie_name} left today"
+        )
+
+    # Create order in database, with its idempotency record in the same transaction
     db_order = Order(**order.dict())
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    db.flush()
+    if stock_id is not None:
+        record_reservation(db, db_order.id, stock_id, order.quantity)
+    result = OrderResponse.model_validate(db_order).model_dump(mode="json")
+    record_response(db, key, fingerprint, key_ttl, db_order.id, result)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A duplicate committed first (possibly on another worker): undo ours and replay it
+        db.rollback()
+        invalidate_stock_levels()
+        try:
+            stored = find_replay(db, key, fingerprint)
+        except IdempotencyConflict:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different order")
+        if stored is None:
+            raise
+        return replay(stored)
     
     # Send notifications asynchronously
     try:
-        from email_service import send_discord_notification
-        # 1. Email (Disabled - using Discord Webhook)
-        # asyncio.create_task(send_order_notification(order.dict()))
-        # 2. Discord Webhook (Simpler, Reliable)
-        asyncio.create_task(send_discord_notification(order.dict()))
+        from email_service import send_discord_notification, enqueue_order_email, call_on_loop
+        # 1. Email (queued per EMAIL_MODE; never waits on SMTP)
+        call_on_loop(enqueue_order_email, result)
+        # 2. Discord Webhook
+        call_on_loop(asyncio.create_task, send_discord_notification(order.model_dump(mode="json")))
     except Exception as e:
-        print(f"⚠️ Notification system error: {str(e)}")
+        logger.warning("Notification system error", extra={"error": str(e)})
     
-    return db_order
+    return result
 
 @app.get("/api/orders", response_model=List[OrderResponse])
-def get_orders(db: Session = Depends(get_db)):
+@query_budget(1)
+def get_orders(db: Session = Depends(get_read_db)):
     return db.query(Order).order_by(Order.created_at.desc()).all()
 
 @app.post("/api/reviews", response_model=ReviewResponse)
 def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
+    # Per-cookie rating summaries are only kept for cookies that exist
+    if review.cookie_name and not db.query(Cookie.id).filter(Cookie.name == review.cookie_name).first():
+        raise HTTPException(status_code=422, detail=f"Unknown cookie: {review.cookie_name}")
     db_review = Review(**review.dict(), approved=False)  # Pending approval by default
     db.add(db_review)
     db.commit()
@@ -239,22 +646,72 @@ def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
     return db_review
 
 @app.get("/api/reviews", response_model=List[ReviewResponse])
-def get_reviews(limit: int = 50, db: Session = Depends(get_db)):
+@query_budget(1)
+def get_reviews(request: Request, response: Response, limit: int = 50, db: Session = Depends(get_read_db)):
     # Create cache key
-    cache_key = f"reviews:limit={limit}"
+    cache_key = _reviews_cache_key(limit)
     
     # Check cache first
-    cached_data = get_cache(cache_key)
-    if cached_data is not None:
-        return cached_data
-    
-    # Fetch from database
-    results = db.query(Review).filter(Review.approved == True).order_by(Review.created_at.desc()).limit(limit).all()
+    results = get_cache(cache_key)
+    if results is None:
+        # Fetch from database
+        results = _review_rows(db, limit)
+        # Store in cache
+        set_cache(cache_key, results, partial(_with_session, _review_rows, limit))
     
-    # Store in cache
-    set_cache(cache_key, results)
+    not_modified = apply_http_caching(request, response, "reviews", cache_version(cache_key))
+    if not_modified is not None:
+        return not_modified
     return results
 
+@app.get("/api/reviews/summary")
+@query_budget(2)
+def get_review_summary(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """Average rating, 1-5 histogram and approved count from the precomputed aggregates"""
+    cache_key = "reviews:summary"
+    summary = get_cache(cache_key)
+    if summary is None:
+        summary = _review_summary(db)
+        set_cache(cache_key, summary, partial(_with_session, _review_summary))
+    not_modified = apply_http_caching(request, response, "reviews", cache_version(cache_key))
+    if not_modified is not None:
+        return not_modified
+    return summary
+
+def _review_summary(db: Session) -> dict:
+    return summary_to_dict(db.get(RatingSummary, ALL_REVIEWS))
+
+def _reviews_cache_key(limit: int) -> str:
+    return f"reviews:limit={limit}"
+
+def _review_rows(db: Session, limit: int) -> list:
+    results = db.query(Review).filter(Review.approved == True).order_by(Review.created_at.desc()).limit(limit).all()
+    return [ReviewResponse.model_validate(r).model_dump() for r in results]
+
+def patch_review_caches(db: Session, approved: list, removed_ids: set):
+    """Apply moderation to the cached public review lists instead of evicting them.
+
+    `approved` are newly visible reviews, `removed_ids` ones no longer visible.
+    Call after commit.
+    """
+    added = [ReviewResponse.model_validate(r).model_dump() for r in approved]
+    hidden = removed_ids | {r["id"] for r in added}
+
+    def patch(key: str, data):
+        if key == "reviews:summary":
+            return _review_summary(db)
+        if not key.startswith("reviews:limit="):
+            return None
+        limit = int(key.split("=", 1)[1])
+        kept = [r for r in data if r["id"] not in hidden]
+        if len(data) == limit and len(kept) < limit:
+            # Rows beyond the cached top-N would move up; refill it in the background
+            cache_stale.add(key)
+        merged = sorted(kept + added, key=lambda r: r["created_at"], reverse=True)
+        return merged[:limit]
+
+    patch_cache("reviews", patch)
+
 @app.get("/test-email")
 async def test_email():
     from email_service import send_order_notification
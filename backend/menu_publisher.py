@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from sqlalchemy.orm import Session
+
+from models import Cookie
+from app_logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still serializes this worker
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # Optional: only the gzip variant is written without it
+    brotli = None
+
+# Static menu snapshots. Every catalog write renders the menu to a content-hashed
+# file (menu-<hash>.json, .json.gz, .json.br) and then swaps menu-latest.json to
+# point at it, so the menu can be served by a static web server or a CDN:
+#   menu-<hash>.json*  -> Cache-Control: public, max-age=31536000, immutable
+#   menu-latest.json   -> Cache-Control: public, max-age=30
+# Off unless MENU_PUBLISH_DIR names a directory that something actually serves.
+MENU_PUBLISH_DIR = os.getenv("MENU_PUBLISH_DIR", "")
+MENU_KEEP_VERSIONS = int(os.getenv("MENU_KEEP_VERSIONS", 5))  # Older snapshots still cached by clients
+MENU_MAX_ITEMS = 1000
+POINTER = "menu-latest.json"
+SUFFIXES = (".json", ".json.gz", ".json.br")
+# Stock and ratings change without catalog writes; they stay on /api/cookies
+LIVE_FIELDS = {"stock_remaining", "average_rating", "review_count"}
+
+logger = get_logger("menu_publisher")
+
+_lock = threading.Lock()
+
+def render_menu(rows: list) -> bytes:
+    """Deterministic JSON, so an unchanged catalog hashes to the same version"""
+    return json.dumps(rows, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+def _write_atomic(path: str, data: bytes):
+    """Readers see the old file or the new one, never a partial write"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _variants(body: bytes) -> dict:
+    variants = {".json": body, ".json.gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".json.br"] = brotli.compress(body, quality=11)
+    return variants
+
+def _prune(directory: str, keep_version: str):
+    """Drop all but the newest MENU_KEEP_VERSIONS snapshots (never the current one)"""
+    snapshots = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.startswith("menu-") and entry.name.endswith(".json") and entry.name != POINTER),
+        key=lambda entry: entry.stat().st_mtime, reverse=True
+    )
+    for entry in snapshots[MENU_KEEP_VERSIONS:]:
+        if keep_version in entry.name:
+            continue
+        for suffix in SUFFIXES:
+            try:
+                os.unlink(os.path.join(directory, entry.name[:-len(".json")] + suffix))
+            except FileNotFoundError:
+                pass
+
+def publish_menu(db: Session):
+    """Render the current catalog and point menu-latest.json at it; returns the version.
+
+    Best effort: a failure is logged and never fails the admin write that triggered it.
+    """
+    if not MENU_PUBLISH_DIR:
+        return None
+    from main import CookieResponse
+    try:
+        os.makedirs(MENU_PUBLISH_DIR, exist_ok=True)
+        with _lock, open(os.path.join(MENU_PUBLISH_DIR, ".publish.lock"), "a") as lock_file:
+            if fcntl is not None:
+                # Other workers publishing at the same time: read and swap one at a time,
+                # so the pointer always ends on the latest committed catalog
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            rows = [
+                CookieResponse.model_validate(cookie).model_dump(exclude=LIVE_FIELDS)
+                for cookie in db.query(Cookie).order_by(Cookie.id).limit(MENU_MAX_ITEMS).all()
+            ]
+            body = render_menu(rows)
+            version = hashlib.sha256(body).hexdigest()[:16]
+            for suffix, data in _variants(body).items():
+                path = os.path.join(MENU_PUBLISH_DIR, f"menu-{version}{suffix}")
+                if not os.path.exists(path):  # Content-addressed: an existing file is already right
+                    _write_atomic(path, data)
+            pointer = {
+                "version": version,
+                "url": f"menu-{version}.json",
+                "count": len(rows),
+                "bytes": len(body),
+                "published_at": datetime.utcnow().isoformat() + "Z",
+            }
+            _write_atomic(os.path.join(MENU_PUBLISH_DIR, POINTER), json.dumps(pointer).encode())
+            _prune(MENU_PUBLISH_DIR, version)
+        logger.info("Menu published", extra={"version": version, "cookies": len(rows)})
+        return version
+    except Exception as e:
+        logger.warning("Menu publish failed", extra={"error": str(e)})
+        return None
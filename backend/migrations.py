@@ -0,0 +1,139 @@
+from datetime import datetime
+from sqlalchemy import inspect, text, String
+
+from app_logging import get_logger
+
+# create_all only creates missing tables, so columns added to existing tables are
+# applied here. Every step is idempotent and runs on startup.
+# (table, column, column DDL, index name or None)
+COLUMN_MIGRATIONS = [
+    ("reviews", "cookie_name", "VARCHAR", "ix_reviews_cookie_name"),
+    ("orders", "contact_normalized", "VARCHAR", "ix_orders_contact_normalized"),
+    ("orders_archive", "contact_normalized", "VARCHAR", "ix_orders_archive_contact_normalized"),
+]
+# Indexes declared in models.py after their table already existed: (index name, table, columns)
+INDEX_MIGRATIONS = [
+    ("ix_orders_created_at", "orders", "created_at"),
+    ("ix_orders_status_created_at", "orders", "status, created_at"),
+]
+
+LEGACY_DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%m-%d-%Y", "%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y"]
+LEGACY_DATE_FORMATS_NO_YEAR = ["%B %d", "%b %d", "%m/%d"]
+
+# PostgreSQL-only indexes needing pg_trgm; skipped (with a warning) if the extension can't be created
+TRIGRAM_INDEX_MIGRATIONS = [
+    ("ix_orders_customer_name_trgm", "orders", "lower(customer_name)"),
+    ("ix_orders_archive_customer_name_trgm", "orders_archive", "lower(customer_name)"),
+    ("ix_orders_cookie_name_trgm", "orders", "lower(cookie_name)"),
+    ("ix_orders_archive_cookie_name_trgm", "orders_archive", "lower(cookie_name)"),
+]
+
+logger = get_logger("migrations")
+
+def _normalize_contact(value):
+    from customers import normalize_contact
+    return normalize_contact(value)
+
+def parse_legacy_date(value: str, created_at: datetime = None):
+    """Best-effort parse of a free-form delivery date; None when it isn't a date"""
+    value = (value or "").strip()
+    if not value:
+        return None
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    # "Dec 5": the next such day on or after the order was placed
+    placed = (created_at or datetime.utcnow()).date()
+    for fmt in LEGACY_DATE_FORMATS_NO_YEAR:
+        try:
+            parsed = datetime.strptime(f"{value} {placed.year}", f"{fmt} %Y").date()
+        except ValueError:
+            continue
+        return parsed if parsed >= placed else parsed.replace(year=placed.year + 1)
+    return None
+
+# Text columns that became typed: (table, column, new DDL, column keeping the old text, parser, index name)
+RETYPE_MIGRATIONS = [
+    ("orders", "delivery_date", "DATE", "delivery_date_legacy", parse_legacy_date, "ix_orders_delivery_date"),
+    ("orders_archive", "delivery_date", "DATE", "delivery_date_legacy", parse_legacy_date, "ix_orders_archive_delivery_date"),
+]
+
+def _retype(conn, table: str, column: str, ddl: str, legacy: str, parser, index_name: str):
+    """Keep the old text under `legacy`, add the typed column and backfill what parses"""
+    conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {column} TO {legacy}"))
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    rows = conn.execute(text(f"SELECT id, {legacy}, created_at FROM {table} WHERE {legacy} IS NOT NULL")).all()
+    values = [
+        # Raw SQL on SQLite hands back timestamps as text
+        {"id": row_id, "value": parser(raw, datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at)}
+        for row_id, raw, created_at in rows
+    ]
+    parsed = [v for v in values if v["value"] is not None]
+    if parsed:
+        conn.execute(text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), parsed)
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})"))
+    logger.info("Retyped column", extra={
+        "table": table, "column": column, "backfilled": len(parsed), "unparsed": len(values) - len(parsed)
+    })
+
+def _backfill(conn, table: str, column: str, source: str, derive):
+    """Fill a newly added derived column from the column it is computed from"""
+    rows = conn.execute(text(f"SELECT id, {source} FROM {table} WHERE {source} IS NOT NULL")).all()
+    values = [{"id": row_id, "value": derive(raw)} for row_id, raw in rows]
+    if values:
+        conn.execute(text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), values)
+    logger.info("Backfilled column", extra={"table": table, "column": column, "rows": len(values)})
+
+# Columns derived from another one, filled when the migration adds them: (table, column) -> (source, derive)
+BACKFILLS = {
+    ("orders", "contact_normalized"): ("contact", _normalize_contact),
+    ("orders_archive", "contact_normalized"): ("contact", _normalize_contact),
+}
+
+def _trigram_indexes(conn, tables: set):
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        logger.warning("pg_trgm unavailable, name search will scan", extra={"error": str(e).splitlines()[0]})
+        return
+    for index_name, table, expression in TRIGRAM_INDEX_MIGRATIONS:
+        if table in tables:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({expression} gin_trgm_ops)"))
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Workers start together; let one migrate while the rest wait and then find nothing to do
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cookie-migrations'))"))
+        elif conn.dialect.name == "sqlite":
+            # Same for processes sharing a SQLite file: hold the write lock from the start
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        for table, column, ddl, index_name in COLUMN_MIGRATIONS:
+            if table not in tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                logger.info("Added column", extra={"table": table, "column": column})
+                if (table, column) in BACKFILLS:
+                    _backfill(conn, table, column, *BACKFILLS[(table, column)])
+            if index_name:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})"))
+        for index_name, table, columns in INDEX_MIGRATIONS:
+            if table in tables:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})"))
+        for table, column, ddl, legacy, parser, index_name in RETYPE_MIGRATIONS:
+            if table not in tables:
+                continue
+            existing = {col["name"]: col["type"] for col in inspector.get_columns(table)}
+            if column in existing and legacy not in existing and isinstance(existing[column], String):
+                _retype(conn, table, column, ddl, legacy, parser, index_name)
+        if conn.dialect.name == "postgresql":
+            _trigram_indexes(conn, tables)
+        elif conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA optimize")  # Refresh planner statistics where they are stale
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Date, UniqueConstraint, Index
+from sqlalchemy.orm import validates
 from database import Base
 from datetime import datetime
 
@@ -14,23 +15,71 @@ class Cookie(Base):
     image = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-class Order(Base):
-    __tablename__ = "orders"
-    
+class OrderFields:
+    """Columns shared by live orders and the archive"""
     id = Column(Integer, primary_key=True, index=True)
     customer_name = Column(String)
     contact = Column(String)
+    contact_normalized = Column(String, nullable=True, index=True)  # National number digits, for customer lookup
     cookie_name = Column(String)
     quantity = Column(Integer)
     notes = Column(Text, nullable=True)
     delivery_address = Column(Text, nullable=True)
     total_price = Column(Float, nullable=True)
     payment_method = Column(String, nullable=True)  # COD, GCash, Bank Transfer
-    delivery_date = Column(String, nullable=True)  # Requested delivery date
+    delivery_date = Column(Date, nullable=True, index=True)  # Requested delivery date
+    delivery_date_legacy = Column(String, nullable=True)  # Free-text date from before it was typed
     order_source = Column(String, default="website")  # website, facebook, phone
     status = Column(String, default="pending")  # pending, confirmed, preparing, out_for_delivery, completed, cancelled
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Index for analytics ranges
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @validates("contact")
+    def _normalize_contact(self, key, value):
+        from customers import normalize_contact
+        self.contact_normalized = normalize_contact(value)
+        return value
+
+class Order(OrderFields, Base):
+    __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_status_created_at", "status", "created_at"),)
+
+class ArchivedOrder(OrderFields, Base):
+    """Closed orders moved out of the hot table by archive.py (ids are kept)"""
+    __tablename__ = "orders_archive"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class CookieStock(Base):
+    __tablename__ = "cookie_stock"
+    __table_args__ = (UniqueConstraint("cookie_name", "stock_date", name="uq_cookie_stock_day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cookie_name = Column(String, index=True)
+    stock_date = Column(Date, index=True)
+    quantity = Column(Integer)  # Cookies baked for the day
+    reserved = Column(Integer, default=0)  # Claimed by orders (never exceeds quantity)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, unique=True, index=True)
+    stock_id = Column(Integer, index=True)
+    quantity = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyRecord(Base):
+    """Stored POST /api/orders response, written in the order's own transaction"""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String, primary_key=True)  # "key:<Idempotency-Key>" or "body:<request fingerprint>"
+    fingerprint = Column(String)
+    order_id = Column(Integer)
+    response = Column(Text)  # JSON of the original response, replayed as-is
+    expires_at = Column(DateTime, index=True)
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -39,9 +88,22 @@ class Review(Base):
     customer_name = Column(String)
     rating = Column(Integer)
     comment = Column(Text)
+    cookie_name = Column(String, nullable=True, index=True)  # Optional: which cookie is reviewed
     approved = Column(Boolean, default=False, index=True)  # Index for filtering approved reviews
     created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Index for ordering
 
+class RatingSummary(Base):
+    __tablename__ = "rating_summaries"
+    
+    scope = Column(String, primary_key=True)  # "*" for all reviews, otherwise a cookie name
+    review_count = Column(Integer, default=0)
+    rating_total = Column(Integer, default=0)
+    stars_1 = Column(Integer, default=0)
+    stars_2 = Column(Integer, default=0)
+    stars_3 = Column(Integer, default=0)
+    stars_4 = Column(Integer, default=0)
+    stars_5 = Column(Integer, default=0)
+
 class Admin(Base):
     __tablename__ = "admins"
     
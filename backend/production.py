@@ -0,0 +1,51 @@
+import os
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Order
+
+# What to bake per delivery day, from open orders. Capacity is cookies the kitchen
+# can bake in a day; 0 leaves days unchecked.
+DAILY_BAKE_CAPACITY = int(os.getenv("DAILY_BAKE_CAPACITY", 0))
+PRODUCTION_STATUSES = ["pending", "confirmed", "preparing"]  # Not yet baked/handed over
+MAX_PLAN_DAYS = 62
+
+class PlanRangeError(ValueError):
+    pass
+
+def production_plan(db: Session, start: date, end: date) -> dict:
+    """Quantity per cookie per delivery day, via one aggregate over ix_orders_delivery_date"""
+    if end < start:
+        raise PlanRangeError("end must not be before start")
+    if (end - start).days >= MAX_PLAN_DAYS:
+        raise PlanRangeError(f"Plan at most {MAX_PLAN_DAYS} days at a time")
+
+    rows = db.query(
+        Order.delivery_date, Order.cookie_name, func.sum(Order.quantity), func.count(Order.id)
+    ).filter(
+        Order.delivery_date >= start,
+        Order.delivery_date <= end,
+        Order.status.in_(PRODUCTION_STATUSES)
+    ).group_by(Order.delivery_date, Order.cookie_name).all()
+
+    by_day = {}
+    for day, cookie_name, quantity, orders in rows:
+        by_day.setdefault(day, []).append({"cookie_name": cookie_name, "quantity": int(quantity or 0), "orders": orders})
+
+    days = []
+    day = start
+    while day <= end:
+        cookies = sorted(by_day.get(day, []), key=lambda c: -c["quantity"])
+        total = sum(c["quantity"] for c in cookies)
+        days.append({
+            "date": day.isoformat(),
+            "total_quantity": total,
+            "orders": sum(c["orders"] for c in cookies),
+            "capacity": DAILY_BAKE_CAPACITY or None,
+            "over_capacity": bool(DAILY_BAKE_CAPACITY) and total > DAILY_BAKE_CAPACITY,
+            "cookies": cookies,
+        })
+        day += timedelta(days=1)
+
+    return {"start": start.isoformat(), "end": end.isoformat(), "statuses": PRODUCTION_STATUSES, "days": days}
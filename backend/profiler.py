@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# On-demand statistical profiler for the current worker: a background thread
+# samples every thread's Python stack at a fixed interval, so the cost is one
+# stack walk per thread per tick and nothing at all between profiles.
+MAX_PROFILE_SECONDS = int(os.getenv("MAX_PROFILE_SECONDS", 60))
+MIN_INTERVAL_MS = 1
+TRACEMALLOC_FRAMES = 10
+
+# Leaf frames of threads that are parked, not working (left out unless idle=True)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("ssl.py", "read"),
+    ("handlers.py", "dequeue"),  # Logging QueueListener
+}
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+_lock = threading.Lock()
+
+def _label(code, labels: dict) -> str:
+    label = labels.get(code)
+    if label is None:
+        filename = os.path.basename(code.co_filename)
+        # ';' separates frames and the last ' ' precedes the count in collapsed stacks
+        label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":").replace(" ", "_")
+        labels[code] = label
+    return label
+
+def _sample(stacks: Counter, labels: dict, thread_names: dict, skip: int, include_idle: bool):
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id == skip:
+            continue
+        leaf = frame.f_code
+        if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+            continue
+        frames = []
+        while frame is not None:
+            frames.append(_label(frame.f_code, labels))
+            frame = frame.f_back
+        frames.append(thread_names.get(thread_id, f"thread-{thread_id}").replace(" ", "_"))
+        stacks[";".join(reversed(frames))] += 1
+
+def _memory_report(baseline, top: int) -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    # The profiler's own bookkeeping isn't what we are looking for
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+    return {
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": [
+            {
+                "location": str(stat.traceback[0]),
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            } for stat in diff[:top]
+        ],
+    }
+
+def profile(seconds: float, interval_ms: float = 10, memory: bool = False, top: int = 25, include_idle: bool = False) -> dict:
+    """Sample this process for `seconds`; blocks, so call it off the event loop.
+
+    Returns collapsed stacks ("frame;frame;frame count" lines, as consumed by
+    flamegraph.pl and speedscope) plus, with memory=True, the top-N allocation
+    sites that grew during the window.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running on this worker")
+    started_tracemalloc = False
+    try:
+        interval = max(interval_ms, MIN_INTERVAL_MS) / 1000
+        baseline = None
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracemalloc = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.take_snapshot()
+
+        stacks, labels = Counter(), {}
+        me = threading.get_ident()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + min(seconds, MAX_PROFILE_SECONDS)
+        next_tick = started
+        while next_tick < deadline:
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            _sample(stacks, labels, thread_names, me, include_idle)
+            samples += 1
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+        elapsed = time.perf_counter() - started
+
+        result = {
+            "pid": os.getpid(),
+            "seconds": round(elapsed, 2),
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n",
+        }
+        if memory:
+            result["memory"] = _memory_report(baseline, top)
+        return result
+    finally:
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _lock.release()
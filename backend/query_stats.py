@@ -0,0 +1,87 @@
+import os
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from app_logging import get_logger
+
+# Per-request SQL statistics collected from SQLAlchemy engine events
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+# When enabled (tests/CI), exceeding a route's query budget raises instead of just logging
+ENFORCE_QUERY_BUDGET = os.getenv("ENFORCE_QUERY_BUDGET", "false").lower() in ("true", "1")
+
+logger = get_logger("sql")
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow = 0
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+_current_stats: ContextVar = ContextVar("query_stats", default=None)
+
+def start_request_stats() -> QueryStats:
+    """Begin collecting stats for the current request context"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+def get_request_stats():
+    return _current_stats.get()
+
+def redact_params(params):
+    """Keep the shape of bound parameters but never their values"""
+    if isinstance(params, dict):
+        return {key: "***" for key in params}
+    if isinstance(params, (list, tuple)):
+        if params and isinstance(params[0], (dict, list, tuple)):
+            return f"<{len(params)} param sets>"
+        return ["***"] * len(params)
+    return "***"
+
+def instrument_engine(engine):
+    """Attach timing hooks to an engine; safe to call once per engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+        if elapsed_ms >= SLOW_QUERY_MS:
+            if stats is not None:
+                stats.slow += 1
+            logger.warning(
+                "Slow query",
+                extra={"duration_ms": round(elapsed_ms, 2), "statement": " ".join(statement.split()), "params": redact_params(parameters)},
+            )
+
+def query_budget(max_queries: int):
+    """Route decorator declaring how many SQL statements an endpoint may issue.
+
+    Place it below the router decorator so FastAPI registers the tagged function.
+    """
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+def server_timing_header(stats: QueryStats) -> str:
+    return f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'
+
+def check_query_budget(endpoint, stats: QueryStats, path: str):
+    """Log (or raise in enforcement mode) when an endpoint exceeds its budget"""
+    budget = getattr(endpoint, "query_budget", None)
+    if budget is None or stats.count <= budget:
+        return
+    message = f"{path} issued {stats.count} queries (budget {budget})"
+    if ENFORCE_QUERY_BUDGET:
+        raise QueryBudgetExceeded(message)
+    logger.warning("Query budget exceeded", extra={"path": path, "queries": stats.count, "budget": budget})
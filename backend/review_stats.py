@@ -0,0 +1,75 @@
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
+
+from models import Review, RatingSummary
+
+# Rating aggregates kept current by moderation instead of by scanning reviews.
+# One row for all approved reviews plus one per cookie that has reviews.
+ALL_REVIEWS = "*"
+
+def _insert_ignore(db: Session, scope: str):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        if db.get(RatingSummary, scope) is None:
+            db.add(RatingSummary(scope=scope))
+            db.flush()
+        return
+    db.execute(insert(RatingSummary).values(scope=scope).on_conflict_do_nothing())
+
+def apply_review(db: Session, review: Review, delta: int):
+    """Add (+1) or remove (-1) an approved review from the aggregates; caller commits"""
+    apply_reviews_bulk(db, [review], delta)
+
+def apply_reviews_bulk(db: Session, reviews, delta: int):
+    """apply_review for many reviews (ORM rows or RETURNING rows): one UPDATE per scope"""
+    changes = {}
+    for review in reviews:
+        star_column = f"stars_{min(max(review.rating, 1), 5)}"
+        for scope in [ALL_REVIEWS] + ([review.cookie_name] if review.cookie_name else []):
+            change = changes.setdefault(scope, {"review_count": 0, "rating_total": 0})
+            change["review_count"] += delta
+            change["rating_total"] += delta * review.rating
+            change[star_column] = change.get(star_column, 0) + delta
+    for scope, change in changes.items():
+        _insert_ignore(db, scope)
+        db.execute(
+            update(RatingSummary)
+            .where(RatingSummary.scope == scope)
+            .values({column: getattr(RatingSummary, column) + amount for column, amount in change.items()})
+        )
+
+def rebuild_rating_summaries(db: Session):
+    """Recompute every aggregate with one GROUP BY (initial backfill / repair)"""
+    rows = db.query(Review.cookie_name, Review.rating, func.count(Review.id)).filter(
+        Review.approved == True
+    ).group_by(Review.cookie_name, Review.rating).all()
+
+    summaries = {ALL_REVIEWS: RatingSummary(scope=ALL_REVIEWS)}
+    for cookie_name, rating, count in rows:
+        targets = [ALL_REVIEWS] + ([cookie_name] if cookie_name else [])
+        for scope in targets:
+            summary = summaries.setdefault(scope, RatingSummary(scope=scope))
+            summary.review_count = (summary.review_count or 0) + count
+            summary.rating_total = (summary.rating_total or 0) + rating * count
+            star_column = f"stars_{min(max(rating, 1), 5)}"
+            setattr(summary, star_column, (getattr(summary, star_column) or 0) + count)
+
+    db.query(RatingSummary).delete()
+    db.add_all(summaries.values())
+    db.commit()
+
+def ensure_rating_summaries(db: Session):
+    if db.get(RatingSummary, ALL_REVIEWS) is None:
+        rebuild_rating_summaries(db)
+
+def summary_to_dict(summary) -> dict:
+    count = summary.review_count if summary else 0
+    return {
+        "average_rating": round(summary.rating_total / count, 2) if count else None,
+        "total_reviews": count,
+        "histogram": {str(star): (getattr(summary, f"stars_{star}") if summary else 0) for star in range(1, 6)},
+    }
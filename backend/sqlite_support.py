@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+from sqlalchemy import event, make_url
+from sqlalchemy.pool import StaticPool
+
+from app_logging import get_logger
+
+# Embedded SQLite mode (DATABASE_URL=sqlite:///path/to/cookie.db) for single-node
+# installs and CI. WAL lets readers run alongside the one writer; writes from this
+# process are serialized up front so they queue on a lock instead of failing with
+# "database is locked" when two transactions race for SQLite's single write slot.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", 64))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", 256))
+# NORMAL is durable across application crashes in WAL mode; FULL also survives power loss
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+READ_STATEMENTS = ("SELECT", "PRAGMA", "EXPLAIN", "WITH")
+
+logger = get_logger("db.sqlite")
+
+_write_lock = threading.Lock()
+
+class SerializedConnection(sqlite3.Connection):
+    """Releases the process-wide write lock once its write transaction ends"""
+
+    holds_write_lock = False
+
+    def _release(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            _write_lock.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._release()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._release()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release()
+
+def engine_options(url, pool_options: dict) -> dict:
+    """create_engine() arguments for a SQLite database (file, or in-memory for tests)"""
+    options = {
+        "connect_args": {
+            "check_same_thread": False,  # Sessions hop between the event loop and threadpool
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            "factory": SerializedConnection,
+            # DML opens its transaction with BEGIN IMMEDIATE: it waits (busy_timeout) for the
+            # write slot up front rather than failing to upgrade a read lock midway
+            "isolation_level": "IMMEDIATE",
+        },
+    }
+    if make_url(url).database in (None, "", ":memory:"):
+        # Every connection would get its own empty database; share one
+        options["poolclass"] = StaticPool
+    else:
+        options.update(pool_options, pool_pre_ping=False)  # Nothing to go stale without a network
+    return options
+
+def configure_engine(engine):
+    """Per-connection pragmas and the write serializer"""
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _serialize_writes(conn, cursor, statement, parameters, context, executemany):
+        dbapi_connection = conn.connection.dbapi_connection
+        if not isinstance(dbapi_connection, SerializedConnection):
+            return  # Connection made with a custom creator
+        if dbapi_connection.holds_write_lock or statement.lstrip()[:7].upper().startswith(READ_STATEMENTS):
+            return
+        if _write_lock.acquire(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000):
+            dbapi_connection.holds_write_lock = True
+        else:
+            # Let SQLite's own busy timeout decide rather than failing here
+            logger.warning("Waited too long for the SQLite write lock", extra={"statement": statement[:80]})
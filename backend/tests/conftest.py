@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Configure the app before anything imports it: an in-memory SQLite database
+# unless TEST_DATABASE_URL points at a PostgreSQL instance, and query budgets
+# enforced so an N+1 regression fails the request instead of logging a warning.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite://")
+os.environ["ENFORCE_QUERY_BUDGET"] = "1"
+os.environ["EMAIL_MODE"] = "off"
+os.environ["TRACE_SAMPLE_RATE"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def app():
+    from main import app
+    return app
+
+@pytest.fixture
+def client(app):
+    # No `with`: startup hooks (bot election, archiver, warm-up) stay off in tests
+    return TestClient(app)
+
+@pytest.fixture
+def admin_headers():
+    from auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': 'admin'})}"}
+
+@pytest.fixture
+def db(app):  # The app import creates the tables
+    from database import SessionLocal, Base, engine
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        # Every test starts from empty tables
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
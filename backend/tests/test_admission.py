@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController
+
+async def _queued(controller, request_class="default"):
+    task = asyncio.create_task(controller.acquire(request_class))
+    await asyncio.sleep(0)  # Let it join the queue
+    return task
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    async def scenario():
+        controller = AdmissionController(limit=1, max_queue=10)
+        assert await controller.acquire("default")
+        waiter = await _queued(controller)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller.in_flight == 0
+        assert await controller.acquire("default")
+
+    asyncio.run(scenario())
+
+def test_slot_granted_to_cancelled_waiter_is_passed_on():
+    async def scenario():
+        controller = AdmissionController(limit=1, max_queue=10)
+        assert await controller.acquire("default")
+        first = await _queued(controller)
+        second = await _queued(controller)
+        controller.release()  # Hands the slot to `first`...
+        first.cancel()        # ...which is cancelled before it resumes
+        try:
+            if await first:
+                controller.release()  # Admitted after all: its request releases as usual
+        except asyncio.CancelledError:
+            pass
+        assert await second
+        assert controller.in_flight == 1
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_queued_requests_are_served_by_priority():
+    async def scenario():
+        controller = AdmissionController(limit=1, max_queue=10)
+        assert await controller.acquire("default")
+        analytics = await _queued(controller, "analytics")
+        checkout = await _queued(controller, "checkout")
+        controller.release()
+        assert await checkout
+        assert not analytics.done()
+        controller.release()
+        assert await analytics
+
+    asyncio.run(scenario())
+
+def test_wait_deadline_rejects_and_leaves_queue():
+    async def scenario():
+        controller = AdmissionController(limit=1, max_queue=10)
+        assert await controller.acquire("default")
+        assert not await controller.acquire("analytics")  # 0.5s deadline
+        assert controller.queue_depth == 0
+        assert controller.rejected["analytics"] == 1
+
+    asyncio.run(scenario())
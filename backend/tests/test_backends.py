@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from archive import archive_closed_orders
+from database import Base, get_db, get_read_db, _create_engine
+from inventory import SoldOut, set_stock, reserve_stock, record_reservation, invalidate_stock_levels
+from migrations import run_migrations
+from models import ArchivedOrder, Cookie, CookieStock, Order, StockReservation
+
+# The same checks against every supported database. PostgreSQL runs when
+# TEST_POSTGRES_URL points at a scratch database (its tables are emptied).
+BACKENDS = {
+    "sqlite-memory": lambda tmp_path: "sqlite://",
+    "sqlite-file": lambda tmp_path: f"sqlite:///{tmp_path / 'cookie.db'}",
+    "postgres": lambda tmp_path: os.getenv("TEST_POSTGRES_URL"),
+}
+
+ORDER = {"customer_name": "Ana", "contact": "09171234567", "cookie_name": "Classic", "quantity": 2}
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request, tmp_path, app):
+    url = BACKENDS[request.param](tmp_path)
+    if not url:
+        pytest.skip("PostgreSQL not covered in this run: set TEST_POSTGRES_URL to a scratch database")
+    engine = _create_engine(url, connect_timeout=5)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_session():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_session
+    app.dependency_overrides[get_read_db] = get_session
+    invalidate_stock_levels()
+    with sessions() as db:
+        db.add(Cookie(name="Classic", description="", ingredients="", category="classic", price=50, image=""))
+        db.commit()
+    yield request.param, engine, sessions
+    app.dependency_overrides.clear()
+    invalidate_stock_levels()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    engine.dispose()
+
+def test_order_creation(backend, app, admin_headers):
+    _, _, sessions = backend
+    client = TestClient(app)
+    created = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "same"})
+    assert created.status_code == 200
+    assert created.json()["total_price"] == 100  # Priced from the catalog
+    replay = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "same"})
+    assert replay.json()["id"] == created.json()["id"]
+    with sessions() as db:
+        order = db.query(Order).one()
+        assert order.contact_normalized == "9171234567"
+    listed = client.get("/api/admin/orders", headers=admin_headers).json()
+    assert [o["id"] for o in listed] == [created.json()["id"]]
+
+def test_stock_reservation_never_oversells(backend):
+    name, _, sessions = backend
+    with sessions() as db:
+        set_stock(db, "Classic", 10)
+
+    def place(i):
+        db = sessions()
+        try:
+            stock_id = reserve_stock(db, "Classic", 1)
+            order = Order(**{**ORDER, "quantity": 1, "customer_name": f"Customer {i}"})
+            db.add(order)
+            db.flush()
+            record_reservation(db, order.id, stock_id, 1)
+            db.commit()
+            return True
+        except SoldOut:
+            return False
+        finally:
+            db.close()
+
+    # One shared connection (in-memory SQLite) can't host concurrent transactions
+    workers = 1 if name == "sqlite-memory" else 8
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        placed = sum(pool.map(place, range(25)))
+    assert placed == 10
+    with sessions() as db:
+        assert db.query(CookieStock.reserved).scalar() == 10
+        assert db.query(StockReservation).count() == db.query(Order).count() == 10
+
+def test_sold_out_order_is_rejected_over_http(backend, app):
+    _, _, sessions = backend
+    with sessions() as db:
+        set_stock(db, "Classic", 3)
+    client = TestClient(app)
+    assert client.post("/api/orders", json=ORDER).status_code == 200
+    response = client.post("/api/orders", json={**ORDER, "customer_name": "Ben"})
+    assert response.status_code == 409
+    assert "Only 1 Classic left" in response.json()["detail"]
+
+def test_archiving_moves_closed_orders(backend, app, admin_headers):
+    _, _, sessions = backend
+    old = datetime.utcnow() - timedelta(days=400)
+    with sessions() as db:
+        for i, status in enumerate(["completed", "cancelled", "pending", "completed"]):
+            touched = old if i < 3 else datetime.utcnow()
+            db.add(Order(**{**ORDER, "customer_name": f"Customer {i}"}, status=status, created_at=touched, updated_at=touched))
+        db.commit()
+        assert archive_closed_orders(db) == 2
+        assert db.query(Order).count() == 2
+        assert db.query(ArchivedOrder).count() == 2
+        assert archive_closed_orders(db) == 0
+
+    client = TestClient(app)
+    live = client.get("/api/admin/orders", headers=admin_headers).json()
+    everything = client.get("/api/admin/orders?include_archived=true", headers=admin_headers).json()
+    assert len(live) == 2 and len(everything) == 4
+    found = client.get("/api/admin/orders/search", params={"q": "0917"}, headers=admin_headers).json()
+    assert len(found["orders"]) == 4  # Search covers the archive too
@@ -0,0 +1,45 @@
+import threading
+
+from cache_bus import PostgresBus, CHANNEL
+
+class RecordingConnection:
+    """Stands in for the bus's dedicated psycopg2 connection"""
+    def __init__(self):
+        self.driver_connection = self
+        self.sent = []
+        self.done = threading.Event()
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        self.sent.append(params)
+        self.done.set()
+
+    def close(self):
+        pass
+
+class RecordingEngine:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def raw_connection(self):
+        return self.connection
+
+def test_publish_notifies_from_its_own_connection(monkeypatch):
+    import cache_bus
+    def no_pool_checkout():
+        raise AssertionError("publish must not use the request pool")
+    monkeypatch.setattr(cache_bus.engine, "connect", no_pool_checkout)
+
+    bus = PostgresBus()
+    connection = RecordingConnection()
+    bus._listen_engine = RecordingEngine(connection)
+    evicted = []
+    bus.subscribe(evicted.append)
+    bus.publish("cookies")
+    assert evicted == ["cookies"]  # Local eviction is immediate
+    assert connection.done.wait(5)
+    bus.stop()
+    assert connection.sent[0][0] == CHANNEL
+    assert connection.sent[0][1].endswith(":cookies")
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from analytics import revenue_timeseries
+from columnar import OrderSnapshot
+from models import Order
+
+Row = namedtuple("Row", "id created_at cookie_name status order_source payment_method quantity total_price updated_at")
+
+def test_more_distinct_values_than_a_small_int_holds(db):
+    # order_source is free text on POST /api/orders; 300 values overflowed an int8 code
+    start = datetime(2026, 3, 1, 4)
+    for i in range(300):
+        db.add(Order(
+            customer_name="Ana", contact="09171234567", cookie_name="Classic", quantity=1, total_price=10 + i,
+            status="completed", order_source=f"partner-{i}", created_at=start + timedelta(hours=i % 48)
+        ))
+    db.commit()
+
+    snapshot = OrderSnapshot()
+    snapshot.refresh(db)
+    assert snapshot.ready and snapshot.size == 300
+
+    args = (date(2026, 3, 1), date(2026, 3, 3), "day", "source")
+    columnar = snapshot.timeseries(*args)
+    assert columnar == revenue_timeseries(db, *args)
+    assert len({point["group"] for point in columnar["series"]}) == 300
+
+def test_cookie_codes_beyond_int16():
+    snapshot = OrderSnapshot()
+    now = datetime.utcnow()
+    count = 40000
+    snapshot._load([
+        Row(i + 1, now, f"cookie-{i}", "completed", "website", "COD", 1, 1.0, now) for i in range(count)
+    ])
+    assert snapshot.size == count
+    assert snapshot.columns["cookie"][:count].max() == count  # Code 0 is NULL
+    assert snapshot.dictionaries["cookie"].values[snapshot.columns["cookie"][count - 1]] == f"cookie-{count - 1}"
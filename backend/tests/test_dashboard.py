@@ -0,0 +1,20 @@
+from admission import classify_request
+from models import Order
+
+def test_dashboard_is_admitted_as_analytics():
+    assert classify_request("GET", "/api/admin/dashboard") == "analytics"
+
+def test_unchanged_dashboard_revalidates_with_304(client, admin_headers, db):
+    first = client.get("/api/admin/dashboard", headers=admin_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    again = client.get("/api/admin/dashboard", headers={**admin_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+
+def test_new_order_changes_dashboard_version(client, admin_headers, db):
+    etag = client.get("/api/admin/dashboard", headers=admin_headers).headers["ETag"]
+    db.add(Order(customer_name="Ana", contact="0917", cookie_name="Classic", quantity=1, total_price=50))
+    db.commit()
+    response = client.get("/api/admin/dashboard", headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stats"]["total_orders"] == 1
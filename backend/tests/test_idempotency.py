@@ -0,0 +1,41 @@
+import main
+from models import Order
+
+ORDER = {"customer_name": "Ana", "contact": "09171234567", "cookie_name": "Classic", "quantity": 2, "total_price": 100}
+
+def test_retry_with_key_replays_original(client, db):
+    first = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "k1"})
+    retry = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "k1"})
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.query(Order).count() == 1
+
+def test_key_reused_for_different_order_is_rejected(client, db):
+    client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "k2"})
+    response = client.post("/api/orders", json={**ORDER, "quantity": 3}, headers={"Idempotency-Key": "k2"})
+    assert response.status_code == 422
+    assert db.query(Order).count() == 1
+
+def test_identical_body_without_key_is_collapsed(client, db):
+    first = client.post("/api/orders", json=ORDER)
+    second = client.post("/api/orders", json={**ORDER, "customer_name": " ana "})
+    assert second.json()["id"] == first.json()["id"]
+    assert db.query(Order).count() == 1
+
+def test_duplicate_committed_elsewhere_is_replayed(client, db, monkeypatch):
+    # Another worker committed the same key after this request looked it up
+    original = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "k3"}).json()
+    lookups = []
+    real_find_replay = main.find_replay
+
+    def find_replay(session, key, fingerprint):
+        lookups.append(key)
+        return None if len(lookups) == 1 else real_find_replay(session, key, fingerprint)
+
+    monkeypatch.setattr(main, "find_replay", find_replay)
+    retry = client.post("/api/orders", json=ORDER, headers={"Idempotency-Key": "k3"})
+    assert retry.status_code == 200
+    assert retry.json() == original
+    assert len(lookups) == 2
+    assert db.query(Order).count() == 1
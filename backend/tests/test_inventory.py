@@ -0,0 +1,119 @@
+import pytest
+
+from inventory import set_stock, invalidate_stock_levels, stock_day
+from models import Cookie, CookieStock, Order, StockReservation
+
+@pytest.fixture
+def stocked(db):
+    for name in ("Classic", "Matcha"):
+        db.add(Cookie(name=name, description="", ingredients="", category="classic", price=50, image=""))
+    db.commit()
+    set_stock(db, "Classic", 10)
+    set_stock(db, "Matcha", 5)
+    invalidate_stock_levels()
+    return db
+
+def reserved(db, cookie_name):
+    db.expire_all()
+    return db.query(CookieStock.reserved).filter(CookieStock.cookie_name == cookie_name).scalar()
+
+def place(client, quantity, customer_name="Ana"):
+    response = client.post("/api/orders", json={
+        "customer_name": customer_name, "contact": "09171234567", "cookie_name": "Classic", "quantity": quantity
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_order_reserves_and_cancel_releases(client, admin_headers, stocked):
+    order_id = place(client, 4)
+    assert reserved(stocked, "Classic") == 4
+    client.patch(f"/api/admin/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+    assert reserved(stocked, "Classic") == 0
+
+def test_sold_out_is_rejected(client, stocked):
+    place(client, 10)
+    response = client.post("/api/orders", json={
+        "customer_name": "Ben", "contact": "09170000000", "cookie_name": "Classic", "quantity": 1
+    })
+    assert response.status_code == 409
+
+def test_quantity_edit_moves_reservation(client, admin_headers, stocked):
+    order_id = place(client, 4)
+    assert client.patch(f"/api/admin/orders/{order_id}", json={"quantity": 7}, headers=admin_headers).status_code == 200
+    assert reserved(stocked, "Classic") == 7
+    assert client.patch(f"/api/admin/orders/{order_id}", json={"quantity": 2}, headers=admin_headers).status_code == 200
+    assert reserved(stocked, "Classic") == 2
+
+def test_cookie_edit_moves_reservation(client, admin_headers, stocked):
+    order_id = place(client, 3)
+    response = client.patch(f"/api/admin/orders/{order_id}", json={"cookie_name": "Matcha"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert reserved(stocked, "Classic") == 0
+    assert reserved(stocked, "Matcha") == 3
+
+def test_edit_beyond_stock_is_rejected_and_rolled_back(client, admin_headers, stocked):
+    order_id = place(client, 4)
+    place(client, 4, customer_name="Ben")  # A different order, not a collapsed duplicate
+    response = client.patch(f"/api/admin/orders/{order_id}", json={"quantity": 7}, headers=admin_headers)
+    assert response.status_code == 409
+    assert reserved(stocked, "Classic") == 8
+    stocked.expire_all()
+    assert stocked.query(StockReservation.quantity).filter(StockReservation.order_id == order_id).scalar() == 4
+
+def test_edit_to_unlimited_cookie_drops_reservation(client, admin_headers, stocked):
+    stocked.add(Cookie(name="Plain", description="", ingredients="", category="classic", price=40, image=""))
+    stocked.commit()
+    order_id = place(client, 3)
+    client.patch(f"/api/admin/orders/{order_id}", json={"cookie_name": "Plain", "quantity": 20}, headers=admin_headers)
+    assert reserved(stocked, "Classic") == 0
+    assert stocked.query(StockReservation).count() == 0
+
+def test_non_positive_quantity_is_rejected(client, admin_headers, stocked):
+    for quantity in (-50, 0):
+        response = client.post("/api/orders", json={
+            "customer_name": "Ana", "contact": "09171234567", "cookie_name": "Classic", "quantity": quantity
+        })
+        assert response.status_code == 422
+    assert reserved(stocked, "Classic") == 0
+    order_id = place(client, 4)
+    response = client.patch(f"/api/admin/orders/{order_id}", json={"quantity": -50}, headers=admin_headers)
+    assert response.status_code == 422
+    assert reserved(stocked, "Classic") == 4
+
+def test_new_limit_applies_before_cache_refresh(client, stocked):
+    stocked.add(Cookie(name="Ube", description="", ingredients="", category="classic", price=60, image=""))
+    stocked.commit()
+    place(client, 1)  # Loads the cached levels without Ube
+    stocked.add(CookieStock(cookie_name="Ube", stock_date=stock_day(), quantity=2, reserved=0))
+    stocked.commit()  # As if set on another worker, with no invalidation reaching this one
+    response = client.post("/api/orders", json={
+        "customer_name": "Ben", "contact": "09170000000", "cookie_name": "Ube", "quantity": 3
+    })
+    assert response.status_code == 409
+    assert reserved(stocked, "Ube") == 0
+
+def test_reopening_cancelled_order_reserves_again(client, admin_headers, stocked):
+    order_id = place(client, 4)
+    client.patch(f"/api/admin/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+    response = client.patch(f"/api/admin/orders/{order_id}", json={"status": "confirmed"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert reserved(stocked, "Classic") == 4
+    assert stocked.query(StockReservation.quantity).filter(StockReservation.order_id == order_id).scalar() == 4
+
+def test_reopening_cancelled_order_beyond_stock_is_rejected(client, admin_headers, stocked):
+    order_id = place(client, 4)
+    client.patch(f"/api/admin/orders/{order_id}", json={"status": "cancelled"}, headers=admin_headers)
+    place(client, 8, customer_name="Ben")
+    response = client.patch(f"/api/admin/orders/{order_id}", json={"status": "confirmed"}, headers=admin_headers)
+    assert response.status_code == 409
+    assert reserved(stocked, "Classic") == 8
+    stocked.expire_all()
+    assert stocked.get(Order, order_id).status == "cancelled"
+
+def test_cookie_list_with_stock_is_always_revalidated(client, stocked):
+    first = client.get("/api/cookies")
+    assert "no-cache" in first.headers["Cache-Control"]
+    place(client, 3)
+    second = client.get("/api/cookies", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert next(c for c in second.json() if c["name"] == "Classic")["stock_remaining"] == 7
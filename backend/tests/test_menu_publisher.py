@@ -0,0 +1,38 @@
+import json
+import os
+
+import menu_publisher
+from models import Cookie
+
+def add_cookie(db, name, price=50):
+    db.add(Cookie(name=name, description="", ingredients="", category="classic", price=price, image=""))
+    db.commit()
+
+def test_publishing_is_off_by_default(db):
+    assert menu_publisher.MENU_PUBLISH_DIR == ""
+    assert menu_publisher.publish_menu(db) is None
+
+def test_publish_is_content_addressed(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(menu_publisher, "MENU_PUBLISH_DIR", str(tmp_path))
+    add_cookie(db, "Classic")
+    version = menu_publisher.publish_menu(db)
+    assert menu_publisher.publish_menu(db) == version  # Unchanged catalog, same file
+
+    pointer = json.loads((tmp_path / "menu-latest.json").read_text())
+    assert pointer["version"] == version and pointer["count"] == 1
+    menu = json.loads((tmp_path / pointer["url"]).read_text())
+    assert [c["name"] for c in menu] == ["Classic"]
+    assert "stock_remaining" not in menu[0]
+    assert (tmp_path / f"menu-{version}.json.gz").exists()
+
+def test_old_versions_are_pruned(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(menu_publisher, "MENU_PUBLISH_DIR", str(tmp_path))
+    monkeypatch.setattr(menu_publisher, "MENU_KEEP_VERSIONS", 2)
+    versions = []
+    for i in range(4):
+        add_cookie(db, f"Cookie {i}")
+        versions.append(menu_publisher.publish_menu(db))
+        # Distinct mtimes so pruning order is well defined
+        os.utime(tmp_path / f"menu-{versions[-1]}.json", (i, i))
+    kept = sorted(p.name for p in tmp_path.glob("menu-*.json") if p.name != "menu-latest.json")
+    assert kept == sorted(f"menu-{v}.json" for v in versions[-2:])
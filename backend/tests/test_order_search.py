@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Order
+
+@pytest.fixture
+def orders(db):
+    now = datetime.utcnow()
+    rows = [
+        ("Ana Cruz", "0917 123 4567", "Matcha Cookie"),
+        ("Ben Reyes", "+63 917-123-4567", "Classic"),
+        ("Carla Matias", "0918 555 0000", "Classic"),
+        ("Dan Santos", "639998887777", "Red Velvet"),
+    ]
+    for i, (name, contact, cookie) in enumerate(rows):
+        db.add(Order(customer_name=name, contact=contact, cookie_name=cookie, quantity=1, total_price=100,
+                     created_at=now - timedelta(minutes=i)))
+    db.commit()
+    return db
+
+def search(client, admin_headers, q, **params):
+    response = client.get("/api/admin/orders/search", params={"q": q, **params}, headers=admin_headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_phone_number_in_any_format(client, admin_headers, orders):
+    for q in ("0917", "+63 917", "+639171", "917-123"):
+        assert {o["customer_name"] for o in search(client, admin_headers, q)["orders"]} == {"Ana Cruz", "Ben Reyes"}
+
+def test_matches_customer_or_cookie_name(client, admin_headers, orders):
+    assert [o["customer_name"] for o in search(client, admin_headers, "mat")["orders"]] == ["Ana Cruz", "Carla Matias"]
+    assert {o["customer_name"] for o in search(client, admin_headers, "velvet")["orders"]} == {"Dan Santos"}
+
+def test_keyset_paging(client, admin_headers, orders):
+    first = search(client, admin_headers, "a", limit=3)
+    rest = search(client, admin_headers, "a", limit=3, cursor=first["next_cursor"])
+    assert rest["next_cursor"] is None
+    names = [o["customer_name"] for o in first["orders"] + rest["orders"]]
+    assert names == ["Ana Cruz", "Ben Reyes", "Carla Matias", "Dan Santos"]
+
+def test_customer_summary(client, admin_headers, orders):
+    response = client.get("/api/admin/customers/09171234567", headers=admin_headers)
+    summary = response.json()
+    assert summary["order_count"] == 2
+    assert summary["customer_name"] == "Ana Cruz"  # From the latest order
+    assert summary["lifetime_value"] == 200
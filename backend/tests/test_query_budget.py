@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from inventory import set_stock, invalidate_stock_levels
+from models import Cookie, Order, Review
+from review_stats import rebuild_rating_summaries
+
+ROWS = 25  # Enough that one query per row would blow any budget
+
+@pytest.fixture
+def catalog(db):
+    now = datetime.utcnow()
+    for i in range(ROWS):
+        name = f"Cookie {i}"
+        db.add(Cookie(name=name, description="Chewy", ingredients="Butter", category="classic", price=50 + i, image=""))
+        db.add(Order(
+            customer_name=f"Customer {i}", contact=f"0917000{i:04d}", cookie_name=name, quantity=2,
+            total_price=100.0, status="pending", created_at=now - timedelta(minutes=i)
+        ))
+        db.add(Review(customer_name=f"Customer {i}", rating=5, comment="Great", cookie_name=name, approved=i % 2 == 0))
+    db.commit()
+    rebuild_rating_summaries(db)
+    for i in range(0, ROWS, 5):
+        set_stock(db, f"Cookie {i}", 100)
+    invalidate_stock_levels()
+    return db
+
+@pytest.mark.parametrize("path", [
+    "/api/admin/orders",
+    "/api/admin/orders?fields=all",
+    "/api/admin/orders?include_archived=true",
+    "/api/admin/reviews",
+    "/api/admin/cookies",
+])
+def test_admin_lists_stay_within_query_budget(client, admin_headers, catalog, path):
+    response = client.get(path, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == ROWS
+
+def test_menu_stays_within_query_budget(client, catalog):
+    from main import invalidate_cache
+    invalidate_cache("cookies")
+    response = client.get("/api/cookies")
+    assert response.status_code == 200
+    cookies = response.json()
+    assert len(cookies) == ROWS
+    assert sum(1 for c in cookies if c["stock_remaining"] is not None) == ROWS // 5
+    assert all(c["review_count"] for c in cookies[::2])
+
+def test_budget_overrun_fails_the_request(client, admin_headers, catalog, monkeypatch):
+    from admin_routes import get_all_reviews
+    from query_stats import QueryBudgetExceeded
+    monkeypatch.setattr(get_all_reviews, "query_budget", 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/api/admin/reviews", headers=admin_headers)
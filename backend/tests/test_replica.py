@@ -0,0 +1,44 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database
+import main
+from database import Base, STICKY_HEADER
+
+ORDER = {"customer_name": "Ana", "contact": "09171234567", "cookie_name": "Classic", "quantity": 1, "total_price": 50}
+
+@pytest.fixture
+def lagging_replica(monkeypatch, db):
+    # A "replica" that never receives the primary's writes
+    replica = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica)
+    replica_sessions = sessionmaker(bind=replica)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", replica_sessions)
+    monkeypatch.setattr(main, "ReplicaSessionLocal", replica_sessions)
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    yield
+    replica.dispose()
+
+def test_write_returns_primary_deadline_header(client, lagging_replica):
+    response = client.post("/api/orders", json=ORDER, headers={"Origin": "http://localhost:5173"})
+    deadline = float(response.headers[STICKY_HEADER])
+    assert time.time() < deadline <= time.time() + database.REPLICA_STICKY_SECONDS
+    assert STICKY_HEADER in response.headers["Access-Control-Expose-Headers"]
+
+def test_echoed_header_reads_own_write_from_primary(client, admin_headers, lagging_replica):
+    deadline = client.post("/api/orders", json=ORDER).headers[STICKY_HEADER]
+    client.cookies.clear()  # Cross-origin SPA: the cookie never comes back
+    assert client.get("/api/admin/orders", headers=admin_headers).json() == []
+    echoed = client.get("/api/admin/orders", headers={**admin_headers, STICKY_HEADER: deadline})
+    assert len(echoed.json()) == 1
+
+@pytest.mark.parametrize("offset", [-1, 3600])
+def test_expired_or_forged_deadline_is_ignored(client, admin_headers, lagging_replica, offset):
+    client.post("/api/orders", json=ORDER)
+    client.cookies.clear()
+    response = client.get("/api/admin/orders", headers={**admin_headers, STICKY_HEADER: str(time.time() + offset)})
+    assert response.json() == []
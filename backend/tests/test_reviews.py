@@ -0,0 +1,28 @@
+from models import Cookie, Review
+
+def add_reviews(db, *comments):
+    for comment in comments:
+        db.add(Review(customer_name="Ana", rating=5, comment=comment, approved=False))
+    db.commit()
+
+def test_bulk_filter_treats_like_wildcards_literally(client, admin_headers, db):
+    add_reviews(db, "100% butter, love it", "1000 stars", "a_b testing", "aXb")
+    response = client.post("/api/admin/reviews/bulk", json={"action": "reject", "filter": {"contains": "100%"}}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()["affected"]) == 1
+    response = client.post("/api/admin/reviews/bulk", json={"action": "reject", "filter": {"contains": "a_b"}}, headers=admin_headers)
+    assert len(response.json()["affected"]) == 1
+    db.expire_all()
+    assert sorted(r.comment for r in db.query(Review)) == ["1000 stars", "aXb"]
+
+def test_review_for_unknown_cookie_is_rejected(client, db):
+    db.add(Cookie(name="Classic", description="", ingredients="", category="classic", price=50, image=""))
+    db.commit()
+    response = client.post("/api/reviews", json={"customer_name": "Ana", "rating": 5, "comment": "Yum", "cookie_name": "Nope"})
+    assert response.status_code == 422
+    response = client.post("/api/reviews", json={"customer_name": "Ana", "rating": 5, "comment": "Yum", "cookie_name": "Classic"})
+    assert response.status_code == 200
+    response = client.post("/api/reviews", json={"customer_name": "Ana", "rating": 5, "comment": "Yum"})
+    assert response.status_code == 200
+    db.expire_all()
+    assert db.query(Review).count() == 2
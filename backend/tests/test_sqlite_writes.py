@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from database import engine, is_sqlite
+
+pytestmark = pytest.mark.skipif(not is_sqlite(engine.url), reason="SQLite write serialization")
+
+ORDER = {"customer_name": "Ana", "contact": "09171234567", "cookie_name": "Classic", "quantity": 1, "total_price": 50}
+HOLD_SECONDS = 1.0
+
+@pytest.mark.parametrize("method, path, body", [
+    ("POST", "/api/orders", ORDER),
+    ("POST", "/api/admin/orders/bulk-status", {"status": "confirmed", "order_ids": [1]}),
+])
+def test_waiting_for_write_lock_does_not_stall_event_loop(app, admin_headers, db, method, path, body):
+    import sqlite_support
+    released = threading.Event()
+
+    def hold_write_lock():
+        with sqlite_support._write_lock:
+            time.sleep(HOLD_SECONDS)
+        released.set()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            holder = threading.Thread(target=hold_write_lock)
+            holder.start()
+            await asyncio.sleep(0.05)
+            write = asyncio.create_task(client.request(method, path, json=body, headers=admin_headers))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            health = await client.get("/")
+            assert health.status_code == 200
+            # Served while the write is still queued on the lock, not after it
+            assert not released.is_set()
+            assert time.monotonic() - started < HOLD_SECONDS / 2
+            assert (await write).status_code == 200
+            holder.join()
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+"""Minimal local stand-in for an OTLP/HTTP trace collector.
+
+Usage: python trace_collector.py [port] [output]   (default 4318, collected_traces.jsonl)
+Run the API with TRACE_EXPORT=otlp; each received span is appended to the output file
+and every finished request is printed as an indented tree.
+"""
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OUTPUT = "collected_traces.jsonl"
+
+def _attributes(items: list) -> dict:
+    return {a["key"]: next(iter(a["value"].values()), None) for a in items or []}
+
+def _print_trace(spans: list, root: dict):
+    children = {}
+    for s in spans:
+        children.setdefault(s.get("parentSpanId"), []).append(s)
+
+    def show(s, depth):
+        ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+        detail = _attributes(s.get("attributes")).get("db.statement") or ""
+        print(f"{'  ' * depth}{s['name']:<40} {ms:8.2f} ms  {detail[:80]}")
+        for child in sorted(children.get(s["spanId"], []), key=lambda c: int(c["startTimeUnixNano"])):
+            show(child, depth + 1)
+
+    print(f"trace {root['traceId']}")
+    show(root, 1)
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    traces = {}
+
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        received = [
+            s for resource in body.get("resourceSpans", [])
+            for scope in resource.get("scopeSpans", [])
+            for s in scope.get("spans", [])
+        ]
+        with open(OUTPUT, "a", encoding="utf-8") as f:
+            for s in received:
+                f.write(json.dumps(s) + "\n")
+                self.traces.setdefault(s["traceId"], []).append(s)
+        for s in received:
+            if s.get("kind") == 2:  # Server span: the request finished
+                _print_trace(self.traces.pop(s["traceId"], []), s)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+def main():
+    global OUTPUT
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 4318
+    OUTPUT = sys.argv[2] if len(sys.argv) > 2 else OUTPUT
+    print(f"📡 Collecting traces on http://localhost:{port}/v1/traces -> {OUTPUT}")
+    ThreadingHTTPServer(("127.0.0.1", port), CollectorHandler).serve_forever()
+
+if __name__ == "__main__":
+    main()
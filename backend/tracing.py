@@ -0,0 +1,284 @@
+import os
+import json
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app_logging import get_logger
+
+# Head-sampled tracing: a request is sampled (or not) once, up front, and every span
+# under it (SQL, pool checkout, outbound HTTP, background tasks it spawns) follows.
+# Unsampled requests only pay for one ContextVar lookup per hook.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.0))
+# file: JSON lines in TRACE_FILE; otlp: OTLP/HTTP JSON to TRACE_OTLP_ENDPOINT
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "great-cookie-api")
+EXPORT_INTERVAL = 2.0
+EXPORT_BATCH = 512
+MAX_PENDING_SPANS = 10000
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+logger = get_logger("tracing")
+
+current_span: ContextVar = ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        exporter.submit(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+def _parse_traceparent(header: Optional[str]):
+    """W3C traceparent -> (trace_id, parent_span_id, sampled) or None"""
+    if not header:
+        return None
+    try:
+        version, trace_id, parent_id, flags = header.split("-")
+        if len(trace_id) == 32 and len(parent_id) == 16:
+            return trace_id, parent_id, int(flags, 16) & 1 == 1
+    except ValueError:
+        pass
+    return None
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes) -> Optional[Span]:
+    """Root (server) span if this request is sampled; honours an upstream sampling decision"""
+    upstream = _parse_traceparent(traceparent)
+    if upstream is not None:
+        trace_id, parent_id, sampled = upstream
+    else:
+        trace_id, parent_id, sampled = None, None, TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if not sampled:
+        return None
+    return Span(name, trace_id or os.urandom(16).hex(), parent_id, SERVER, attributes)
+
+def child_span(name: str, kind: int = INTERNAL, **attributes) -> Optional[Span]:
+    """A span under the current one, or None when the current request isn't sampled"""
+    parent = current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes):
+    """Context manager form of child_span; nested spans parent to it"""
+    s = child_span(name, kind, **attributes)
+    if s is None:
+        yield None
+        return
+    token = current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.end(e)
+        raise
+    else:
+        s.end()
+    finally:
+        current_span.reset(token)
+
+# --- Instrumentation ---
+
+def trace_engine(engine):
+    """One span per SQL statement (text only, never parameters)"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        s = child_span("db.query", CLIENT, **{"db.system": engine.dialect.name, "db.statement": statement[:500]})
+        if s is not None and context is not None:
+            context._trace_span = s
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        s = getattr(context, "_trace_span", None)
+        if s is not None:
+            s.set(**{"db.rows": cursor.rowcount})
+            s.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        s = getattr(exception_context.execution_context, "_trace_span", None)
+        if s is not None:
+            s.end(exception_context.original_exception)
+
+class TracedQueuePool(QueuePool):
+    """QueuePool that records how long a sampled request waited for a connection"""
+
+    def _do_get(self):
+        if current_span.get() is None:
+            return super()._do_get()
+        with span("db.pool.checkout", **{"pool.checked_out": self.checkedout()}):
+            return super()._do_get()
+
+def aiohttp_trace_config():
+    """aiohttp TraceConfig: a client span per outbound request, with traceparent propagated"""
+    import aiohttp
+
+    async def on_start(session, ctx, params):
+        s = child_span("http.client", CLIENT, **{"http.method": params.method, "http.url": str(params.url.with_query(None))})
+        ctx.trace_span = s
+        if s is not None:
+            params.headers["traceparent"] = s.traceparent
+
+    async def on_end(session, ctx, params):
+        s = getattr(ctx, "trace_span", None)
+        if s is not None:
+            s.set(**{"http.status_code": params.response.status})
+            s.end()
+
+    async def on_exception(session, ctx, params):
+        s = getattr(ctx, "trace_span", None)
+        if s is not None:
+            s.end(params.exception)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_start)
+    config.on_request_end.append(on_end)
+    config.on_request_exception.append(on_exception)
+    return config
+
+# --- Export ---
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans: list) -> dict:
+    """OTLP/HTTP JSON ExportTraceServiceRequest"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "cookie.tracing"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": s.kind,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+            } for s in spans],
+        }],
+    }]}
+
+class SpanExporter:
+    """Finished spans go through a bounded queue to a background thread; never blocks requests"""
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=MAX_PENDING_SPANS)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, s: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch:
+                self.flush(batch)
+
+    def flush(self, batch: list):
+        with self._flush_lock:
+            self._write(batch)
+
+    def _write(self, batch: list):
+        try:
+            if TRACE_EXPORT == "otlp":
+                request = urllib.request.Request(
+                    TRACE_OTLP_ENDPOINT, data=json.dumps(to_otlp(batch)).encode(),
+                    headers={"Content-Type": "application/json"}, method="POST"
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+            else:
+                with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                    for s in batch:
+                        f.write(json.dumps(s.to_dict(), default=str) + "\n")
+        except Exception as e:
+            logger.warning("Span export failed", extra={"spans": len(batch), "error": str(e)})
+
+    def drain(self):
+        """Export whatever is queued (shutdown, tests)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+
+exporter = SpanExporter()
+
+def tracing_enabled() -> bool:
+    return TRACE_SAMPLE_RATE > 0
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useSearchParams, useNavigate } from 'react-router-dom';
-import API_URL from '../config/api';
+import API_URL, { MENU_URL, apiFetch } from '../config/api';
 
 interface MenuProps {
     onOrderClick: (cookieName: string) => void;
@@ -32,6 +32,27 @@ const Menu: React.FC<MenuProps> = ({ onOrderClick }) => {
         fetchCookies();
     }, []);
 
+    // Static snapshot first (no backend involved), the API if it isn't published or reachable
+    const loadMenu = async (signal: AbortSignal) => {
+        if (MENU_URL) {
+            try {
+                const pointer = await fetch(`${MENU_URL}/menu-latest.json`, { signal, cache: 'no-cache' });
+                if (pointer.ok) {
+                    const { url } = await pointer.json();
+                    const menu = await fetch(`${MENU_URL}/${url}`, { signal });
+                    if (menu.ok) return menu.json();
+                }
+            } catch (err: any) {
+                if (err.name === 'AbortError') throw err;
+            }
+        }
+        const response = await apiFetch(`${API_URL}/cookies`, { signal });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    };
+
     const fetchCookies = async () => {
         setLoading(true);
         setError(null);
@@ -41,16 +62,8 @@ const Menu: React.FC<MenuProps> = ({ onOrderClick }) => {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
 
-            const response = await fetch(`${API_URL}/cookies`, {
-                signal: controller.signal
-            });
+            const data = await loadMenu(controller.signal);
             clearTimeout(timeoutId);
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const data = await response.json();
             // Add weight if not present
             const cookiesWithWeight = data.map((cookie: Cookie) => ({
                 ...cookie,
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface OrderFormModalProps {
     isOpen: boolean;
@@ -18,6 +18,8 @@ const OrderFormModal: React.FC<OrderFormModalProps> = ({ isOpen, onClose, select
     const [deliveryDate, setDeliveryDate] = useState('');
     const [loading, setLoading] = useState(false);
     const [message, setMessage] = useState<{ type: 'success' | 'error', text: string } | null>(null);
+    // One key per order attempt so retries and double taps are collapsed server-side
+    const [idempotencyKey, setIdempotencyKey] = useState(() => crypto.randomUUID());
 
     // Update cookie selection when selectedCookie prop changes
     useEffect(() => {
@@ -41,9 +43,9 @@ const OrderFormModal: React.FC<OrderFormModalProps> = ({ isOpen, onClose, select
 
         // 1. Save to Database First (to capture Revenue)
         try {
-            await fetch(`${API_URL}/orders`, {
+            await apiFetch(`${API_URL}/orders`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
                 body: JSON.stringify({
                     customer_name: name,
                     contact: contact,
@@ -91,10 +93,11 @@ Please confirm this order. Thank you!`;
         setMessage(null);
 
         try {
-            const response = await fetch(`${API_URL}/orders`, {
+            const response = await apiFetch(`${API_URL}/orders`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Idempotency-Key': idempotencyKey,
                 },
                 body: JSON.stringify({
                     customer_name: name,
@@ -136,6 +139,7 @@ Please confirm this order. Thank you!`;
         setPaymentMethod('COD');
         setDeliveryDate('');
         setMessage(null);
+        setIdempotencyKey(crypto.randomUUID());
     };
 
     return (
@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface ReviewFormModalProps {
     isOpen: boolean;
@@ -22,7 +22,7 @@ const ReviewFormModal: React.FC<ReviewFormModalProps> = ({ isOpen, onClose, onSu
         }
 
         try {
-            const response = await fetch(`${API_URL}/reviews`, {
+            const response = await apiFetch(`${API_URL}/reviews`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface Review {
     id: number;
@@ -31,7 +31,7 @@ const Reviews: React.FC<ReviewsProps> = ({ onOpenForm }) => {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
 
-            const response = await fetch(`${API_URL}/reviews`, {
+            const response = await apiFetch(`${API_URL}/reviews`, {
                 signal: controller.signal
             });
             clearTimeout(timeoutId);
@@ -1,4 +1,28 @@
 // API Configuration
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
+// Optional: where the backend publishes static menu snapshots (e.g. /menu or a CDN URL)
+export const MENU_URL = import.meta.env.VITE_MENU_URL || '';
+
+// Read-your-writes behind a read replica: after a write the API answers with
+// X-Primary-Until, and echoing it back keeps this tab's reads on the primary
+// until then (a cookie wouldn't reach an API on another origin).
+const PRIMARY_UNTIL_HEADER = 'X-Primary-Until';
+const PRIMARY_UNTIL_KEY = 'db_primary_until';
+
+export async function apiFetch(input: string, init: RequestInit = {}): Promise<Response> {
+    const headers = new Headers(init.headers);
+    const primaryUntil = Number(sessionStorage.getItem(PRIMARY_UNTIL_KEY));
+    // A little slack for clock skew; the server checks the time itself
+    if (primaryUntil && primaryUntil + 60 > Date.now() / 1000) {
+        headers.set(PRIMARY_UNTIL_HEADER, String(primaryUntil));
+    }
+    const response = await fetch(input, { ...init, headers });
+    const until = response.headers.get(PRIMARY_UNTIL_HEADER);
+    if (until) {
+        sessionStorage.setItem(PRIMARY_UNTIL_KEY, until);
+    }
+    return response;
+}
+
 export default API_URL;
@@ -0,0 +1,50 @@
+import { useEffect, useState } from 'react';
+import API_URL, { apiFetch } from '../config/api';
+
+// GET /api/admin/dashboard builds every section at once, so the dashboard and
+// analytics pages share one copy: switching pages shows it right away and only
+// revalidates it (a one-query 304 when nothing changed) instead of rebuilding it.
+type Dashboard = Record<string, unknown>;
+
+let cached: Dashboard | null = null;
+let inFlight: Promise<Dashboard | null> | null = null;
+
+const loadDashboard = (): Promise<Dashboard | null> => {
+    if (!inFlight) {
+        const token = localStorage.getItem('admin_token');
+        inFlight = apiFetch(`${API_URL.replace('/api', '')}/api/admin/dashboard`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        })
+            .then(response => (response.ok ? response.json() : cached))
+            .then(data => {
+                cached = data;
+                return data;
+            })
+            .finally(() => {
+                inFlight = null;
+            });
+    }
+    return inFlight;
+};
+
+export const useDashboard = <T>(section: string) => {
+    const [data, setData] = useState<T | null>(() => (cached ? (cached[section] as T) : null));
+    const [loading, setLoading] = useState(cached === null);
+
+    useEffect(() => {
+        let active = true;
+        loadDashboard()
+            .then(dashboard => {
+                if (active && dashboard) setData(dashboard[section] as T);
+            })
+            .catch(error => console.error('Failed to fetch dashboard:', error))
+            .finally(() => {
+                if (active) setLoading(false);
+            });
+        return () => {
+            active = false;
+        };
+    }, [section]);
+
+    return { data, loading };
+};
@@ -1,5 +1,5 @@
 import { useEffect, useState, useRef } from 'react';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 export const useOrderNotifications = () => {
     const [newOrdersCount, setNewOrdersCount] = useState(0);
@@ -29,7 +29,7 @@ export const useOrderNotifications = () => {
         if (!token) return;
 
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/orders?status=pending`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders?status=pending`, {
                 headers: { 'Authorization': `Bearer ${token}` }
             });
 
@@ -1,6 +1,6 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { Link } from 'react-router-dom';
-import API_URL from '../config/api';
+import { useDashboard } from '../hooks/useDashboard';
 
 interface Analytics {
     total_revenue: number;
@@ -20,28 +20,7 @@ interface Analytics {
 }
 
 const AdminAnalytics: React.FC = () => {
-    const [analytics, setAnalytics] = useState<Analytics | null>(null);
-    const [loading, setLoading] = useState(true);
-
-    useEffect(() => {
-        fetchAnalytics();
-    }, []);
-
-    const fetchAnalytics = async () => {
-        const token = localStorage.getItem('admin_token');
-        try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/analytics/revenue`, {
-                headers: { 'Authorization': `Bearer ${token}` }
-            });
-            if (response.ok) {
-                setAnalytics(await response.json());
-            }
-        } catch (error) {
-            console.error('Failed to fetch analytics:', error);
-        } finally {
-            setLoading(false);
-        }
-    };
+    const { data: analytics, loading } = useDashboard<Analytics>('analytics');
 
     if (loading) {
         return (
@@ -1,6 +1,6 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { Link } from 'react-router-dom';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface Cookie {
     id: number;
@@ -26,7 +26,7 @@ const AdminCookies: React.FC = () => {
 
     const fetchCookies = async () => {
         const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/cookies`, {
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/cookies`, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         if (response.ok) {
@@ -49,7 +49,7 @@ const AdminCookies: React.FC = () => {
         formData.append('file', file);
 
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/upload-image`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/upload-image`, {
                 method: 'POST',
                 headers: { 'Authorization': `Bearer ${token}` },
                 body: formData
@@ -69,7 +69,7 @@ const AdminCookies: React.FC = () => {
 
     const handleSave = async (id: number) => {
         const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/cookies/${id}`, {
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/cookies/${id}`, {
             method: 'PUT',
             headers: {
                 'Authorization': `Bearer ${token}`,
@@ -88,7 +88,7 @@ const AdminCookies: React.FC = () => {
         if (!confirm('Are you sure you want to delete this cookie?')) return;
 
         const token = localStorage.getItem('admin_token');
-        await fetch(`${API_URL.replace('/api', '')}/api/admin/cookies/${id}`, {
+        await apiFetch(`${API_URL.replace('/api', '')}/api/admin/cookies/${id}`, {
             method: 'DELETE',
             headers: { 'Authorization': `Bearer ${token}` }
         });
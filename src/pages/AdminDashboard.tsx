@@ -1,7 +1,7 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { useOrderNotifications } from '../hooks/useOrderNotifications';
-import API_URL from '../config/api';
+import { useDashboard } from '../hooks/useDashboard';
 
 interface Stats {
     total_cookies: number;
@@ -11,24 +11,10 @@ interface Stats {
 }
 
 const AdminDashboard: React.FC = () => {
-    const [stats, setStats] = useState<Stats | null>(null);
+    const { data: stats } = useDashboard<Stats>('stats');
     const navigate = useNavigate();
     const { newOrdersCount, clearNotifications } = useOrderNotifications();
 
-    useEffect(() => {
-        fetchStats();
-    }, []);
-
-    const fetchStats = async () => {
-        const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/stats`, {
-            headers: { 'Authorization': `Bearer ${token}` }
-        });
-        if (response.ok) {
-            setStats(await response.json());
-        }
-    };
-
     const handleLogout = () => {
         localStorage.removeItem('admin_token');
         navigate('/admin');
@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 import logo from '../assets/cookies/logo16.png';
 
 const AdminLogin: React.FC = () => {
@@ -16,7 +16,7 @@ const AdminLogin: React.FC = () => {
         setLoading(true);
 
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/login`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/login`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ username, password })
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface Order {
     id: number;
@@ -13,16 +13,32 @@ interface Order {
     total_price: number | null;
     payment_method: string | null;
     delivery_date: string | null;
+    delivery_date_legacy?: string | null;
     order_source: string;
     status: string;
     created_at: string;
     updated_at: string;
 }
 
+interface CustomerSummary {
+    contact: string;
+    customer_name: string;
+    order_count: number;
+    active_order_count: number;
+    lifetime_value: number;
+    cookies_ordered: number;
+    first_order_at: string;
+    last_order_at: string;
+}
+
 const AdminOrders: React.FC = () => {
     const [orders, setOrders] = useState<Order[]>([]);
     const [filterStatus, setFilterStatus] = useState<string>('all');
     const [searchTerm, setSearchTerm] = useState('');
+    // Server-side search over the whole history (names and phone numbers in any format)
+    const [searchResults, setSearchResults] = useState<Order[] | null>(null);
+    const [searchCursor, setSearchCursor] = useState<string | null>(null);
+    const [customerSummary, setCustomerSummary] = useState<CustomerSummary | null>(null);
     const [selectedOrder, setSelectedOrder] = useState<Order | null>(null);
 
     // Manual Order State
@@ -60,9 +76,51 @@ const AdminOrders: React.FC = () => {
         return () => clearInterval(interval);
     }, [filterStatus]);
 
+    useEffect(() => {
+        const term = searchTerm.trim();
+        if (term.length < 2) {
+            setSearchResults(null);
+            setSearchCursor(null);
+            setCustomerSummary(null);
+            return;
+        }
+        const timer = setTimeout(() => {
+            searchOrders(term, null);
+            fetchCustomerSummary(term);
+        }, 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    const searchOrders = async (term: string, cursor: string | null) => {
+        const token = localStorage.getItem('admin_token');
+        const params = new URLSearchParams({ q: term, limit: '50' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders/search?${params}`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (response.ok) {
+            const data = await response.json();
+            setSearchResults(prev => (cursor && prev ? [...prev, ...data.orders] : data.orders));
+            setSearchCursor(data.next_cursor);
+        }
+    };
+
+    const fetchCustomerSummary = async (term: string) => {
+        // Only phone numbers identify a customer
+        if (!/^[\d\s+().-]+$/.test(term) || term.replace(/\D/g, '').length < 7) {
+            setCustomerSummary(null);
+            return;
+        }
+        const token = localStorage.getItem('admin_token');
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/customers/${encodeURIComponent(term)}`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        setCustomerSummary(response.ok ? await response.json() : null);
+    };
+
     const fetchCookies = async () => {
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/cookies`);
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/cookies`);
             if (response.ok) {
                 const data = await response.json();
                 setCookies(data);
@@ -88,7 +146,7 @@ const AdminOrders: React.FC = () => {
             ? `${API_URL.replace('/api', '')}/api/admin/orders`
             : `${API_URL.replace('/api', '')}/api/admin/orders?status=${filterStatus}`;
 
-        const response = await fetch(url, {
+        const response = await apiFetch(url, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         if (response.ok) {
@@ -107,9 +165,18 @@ const AdminOrders: React.FC = () => {
         }
     };
 
+    // The list carries only the table columns; notes/address come with the full order
+    const fetchOrderDetail = async (orderId: number): Promise<Order | null> => {
+        const token = localStorage.getItem('admin_token');
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders/${orderId}`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        return response.ok ? await response.json() : null;
+    };
+
     const updateOrderStatus = async (orderId: number, newStatus: string) => {
         const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/orders/${orderId}`, {
+        const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders/${orderId}`, {
             method: 'PATCH',
             headers: {
                 'Authorization': `Bearer ${token}`,
@@ -128,7 +195,7 @@ const AdminOrders: React.FC = () => {
         setSubmitting(true);
 
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/orders`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/orders`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -169,7 +236,7 @@ const AdminOrders: React.FC = () => {
         const token = localStorage.getItem('admin_token');
 
         try {
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/orders/${editingOrder.id}`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders/${editingOrder.id}`, {
                 method: 'PATCH',
                 headers: {
                     'Authorization': `Bearer ${token}`,
@@ -186,6 +253,9 @@ const AdminOrders: React.FC = () => {
                 fetchOrders();
                 setIsEditModalOpen(false);
                 setEditingOrder(null);
+            } else if (response.status === 409) {
+                const error = await response.json();
+                alert(error.detail);
             } else {
                 alert('Failed to update order');
             }
@@ -213,18 +283,16 @@ const AdminOrders: React.FC = () => {
         return status.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
     };
 
-    const filteredOrders = orders.filter(order =>
-        order.customer_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        order.contact.includes(searchTerm) ||
-        order.cookie_name.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    const filteredOrders = searchResults === null
+        ? orders
+        : searchResults.filter(order => filterStatus === 'all' || order.status === filterStatus);
 
     const handleDeleteOrder = async (id: number) => {
         if (!confirm('Are you sure you want to delete this order? This action cannot be undone.')) return;
 
         try {
             const token = localStorage.getItem('admin_token');
-            const response = await fetch(`${API_URL.replace('/api', '')}/api/admin/orders/${id}`, {
+            const response = await apiFetch(`${API_URL.replace('/api', '')}/api/admin/orders/${id}`, {
                 method: 'DELETE',
                 headers: { 'Authorization': `Bearer ${token}` }
             });
@@ -257,7 +325,7 @@ const AdminOrders: React.FC = () => {
                             onClick={(e) => {
                                 const token = localStorage.getItem('admin_token');
                                 e.preventDefault();
-                                fetch(e.currentTarget.href, {
+                                apiFetch(e.currentTarget.href, {
                                     headers: { 'Authorization': `Bearer ${token}` }
                                 }).then(res => res.blob()).then(blob => {
                                     const url = window.URL.createObjectURL(blob);
@@ -288,7 +356,7 @@ const AdminOrders: React.FC = () => {
                         <div className="flex-1">
                             <input
                                 type="text"
-                                placeholder="Search by customer name, contact, or cookie..."
+                                placeholder="Search by customer, cookie or contact number..."
                                 value={searchTerm}
                                 onChange={(e) => setSearchTerm(e.target.value)}
                                 className="w-full px-4 py-2 border-2 border-gray-200 rounded-xl focus:outline-none focus:ring-2 focus:ring-black"
@@ -311,6 +379,32 @@ const AdminOrders: React.FC = () => {
                     </div>
                 </div>
 
+                {/* Customer summary for a phone number search */}
+                {customerSummary && (
+                    <div className="bg-white rounded-2xl shadow-md p-4 mb-6 flex flex-wrap gap-6 items-center">
+                        <div>
+                            <p className="text-xs text-gray-500">Customer</p>
+                            <p className="font-bold">{customerSummary.customer_name}</p>
+                        </div>
+                        <div>
+                            <p className="text-xs text-gray-500">Orders</p>
+                            <p className="font-bold">{customerSummary.order_count} ({customerSummary.active_order_count} not cancelled)</p>
+                        </div>
+                        <div>
+                            <p className="text-xs text-gray-500">Lifetime Value</p>
+                            <p className="font-bold">₱{customerSummary.lifetime_value.toLocaleString()}</p>
+                        </div>
+                        <div>
+                            <p className="text-xs text-gray-500">Cookies</p>
+                            <p className="font-bold">{customerSummary.cookies_ordered}</p>
+                        </div>
+                        <div>
+                            <p className="text-xs text-gray-500">Last Order</p>
+                            <p className="font-bold">{new Date(customerSummary.last_order_at).toLocaleDateString()}</p>
+                        </div>
+                    </div>
+                )}
+
                 {/* Orders Table */}
                 <div className="bg-white rounded-2xl shadow-lg overflow-hidden">
                     <div className="overflow-x-auto">
@@ -364,12 +458,13 @@ const AdminOrders: React.FC = () => {
                                         <td className="px-6 py-4 text-sm">{new Date(order.created_at).toLocaleDateString()}</td>
                                         <td className="px-6 py-4">
                                             <button
-                                                onClick={() => {
+                                                onClick={async () => {
+                                                    const detail = await fetchOrderDetail(order.id);
                                                     setEditingOrder({
                                                         id: order.id,
                                                         cookie_name: order.cookie_name,
                                                         quantity: order.quantity,
-                                                        notes: order.notes || ''
+                                                        notes: detail?.notes || ''
                                                     });
                                                     setIsEditModalOpen(true);
                                                 }}
@@ -378,7 +473,7 @@ const AdminOrders: React.FC = () => {
                                                 Edit
                                             </button>
                                             <button
-                                                onClick={() => setSelectedOrder(order)}
+                                                onClick={async () => setSelectedOrder(await fetchOrderDetail(order.id))}
                                                 className="text-blue-600 hover:text-blue-800 font-semibold text-sm mr-3"
                                             >
                                                 View
@@ -400,6 +495,16 @@ const AdminOrders: React.FC = () => {
                             No orders found
                         </div>
                     )}
+                    {searchResults !== null && searchCursor && (
+                        <div className="text-center py-4 border-t">
+                            <button
+                                onClick={() => searchOrders(searchTerm.trim(), searchCursor)}
+                                className="px-4 py-2 rounded-xl font-semibold bg-gray-100 text-gray-700 hover:bg-gray-200"
+                            >
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 
@@ -460,7 +565,7 @@ const AdminOrders: React.FC = () => {
                                 </div>
                                 <div>
                                     <label className="text-sm font-bold text-gray-700">Delivery Date</label>
-                                    <p className="text-gray-900">{selectedOrder.delivery_date || 'Not specified'}</p>
+                                    <p className="text-gray-900">{selectedOrder.delivery_date || selectedOrder.delivery_date_legacy || 'Not specified'}</p>
                                 </div>
                             </div>
 
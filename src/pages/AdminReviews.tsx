@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import API_URL from '../config/api';
+import API_URL, { apiFetch } from '../config/api';
 
 interface Review {
     id: number;
@@ -31,7 +31,7 @@ const AdminReviews: React.FC = () => {
 
             console.log('Fetching reviews from:', url);
 
-            const response = await fetch(url, {
+            const response = await apiFetch(url, {
                 headers: { 'Authorization': `Bearer ${token}` }
             });
 
@@ -57,7 +57,7 @@ const AdminReviews: React.FC = () => {
     const handleApprove = async (id: number) => {
         const token = localStorage.getItem('admin_token');
         const baseUrl = API_URL.replace(/\/api$/, '');
-        await fetch(`${baseUrl}/api/admin/reviews/${id}/approve`, {
+        await apiFetch(`${baseUrl}/api/admin/reviews/${id}/approve`, {
             method: 'PUT',
             headers: { 'Authorization': `Bearer ${token}` }
         });
@@ -69,7 +69,7 @@ const AdminReviews: React.FC = () => {
 
         const token = localStorage.getItem('admin_token');
         const baseUrl = API_URL.replace(/\/api$/, '');
-        await fetch(`${baseUrl}/api/admin/reviews/${id}`, {
+        await apiFetch(`${baseUrl}/api/admin/reviews/${id}`, {
             method: 'DELETE',
             headers: { 'Authorization': `Bearer ${token}` }
         });